@@ -15,14 +15,12 @@ import sys
 from collections import defaultdict
 from pathlib import Path
 
-import yaml
-
 from mpg_db import get_conn
 from mpg_legacy_engine import (
     list_included_divisions, fetch_matches, compute_mpg_season_standings,
     compute_streaks,
 )
-from mpg_people import DEFAULT_MAPPING_PATH
+from mpg_people import DEFAULT_MAPPING_PATH, read_people_yaml
 
 BASE_DIR = Path(__file__).parent
 DOCS_DIR = BASE_DIR / "docs"
@@ -141,7 +139,7 @@ def slabel(div_id: str) -> str:
     return f"S{n}"
 
 def _load_display_names() -> dict[str, str]:
-    data = yaml.safe_load(DEFAULT_MAPPING_PATH.read_text(encoding="utf-8"))
+    data = read_people_yaml(DEFAULT_MAPPING_PATH)
     return {
         pid: info.get("display_name", pid)
         for pid, info in data.get("persons", {}).items()
@@ -3,6 +3,7 @@
 import argparse
 import json
 import os
+import re
 import sys
 from collections import defaultdict
 from dotenv import load_dotenv
@@ -27,6 +28,10 @@ load_dotenv()
 BASE_URL = "https://api.mpg.football"
 TOTAL_GAME_WEEKS = 14
 
+# Ligne utile du divisions-file : ni vide ni commentaire (#), blancs de bord
+# retirés — un seul findall dans le moteur regex C
+_DIV_LINE_RE = re.compile(r"(?m)^[ \t]*([^#\s][^\n]*?)[ \t]*$")
+
 
 def _get_env(key: str) -> str:
     value = os.getenv(key)
@@ -343,8 +348,7 @@ def _run_batch(
 ) -> None:
     """Boucle --force sur toutes les divisions du fichier texte."""
     from pathlib import Path as _P
-    lines = _P(args.divisions_file).read_text(encoding="utf-8").strip().splitlines()
-    divisions = [l.strip() for l in lines if l.strip() and not l.startswith("#")]
+    divisions = _DIV_LINE_RE.findall(_P(args.divisions_file).read_text(encoding="utf-8"))
 
     batch_label = args.league_batch_name or args.divisions_file
     print(f"\n[BATCH] {batch_label} — {len(divisions)} division(s)")
@@ -388,6 +392,8 @@ if __name__ == "__main__":
     # Affichage
     parser.add_argument("--bonuses",           action="store_true", help="Rapport bonus restants")
     parser.add_argument("--stats",             action="store_true", help="Afficher classement stats")
+    parser.add_argument("--stats-top",         default=None,  type=int, metavar="N",
+                        help="Limiter le classement stats aux N premiers")
     parser.add_argument("--include-covid",      action="store_true",
                         help="Inclure les divisions COVID dans les stats")
     parser.add_argument("--include-incomplete", action="store_true",
@@ -469,6 +475,7 @@ if __name__ == "__main__":
             division_id=division_id_effective,
             include_covid=args.include_covid,
             include_incomplete=args.include_incomplete,
+            top=args.stats_top,
         )
 
     if args.doctor:
@@ -13,9 +13,31 @@ def get_conn() -> sqlite3.Connection:
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("PRAGMA foreign_keys=ON")
+    _apply_read_pragmas(conn)
     return conn
 
 
+def get_ro_conn() -> sqlite3.Connection:
+    """Connexion lecture seule (mode=ro + query_only) pour les stats.
+
+    Aucune écriture possible : pas de verrou réservé ni de journal côté
+    lecteur. Mêmes pragmas de lecture que get_conn.
+    """
+    conn = sqlite3.connect(f"{DB_PATH.as_uri()}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA query_only=1")
+    _apply_read_pragmas(conn)
+    return conn
+
+
+def _apply_read_pragmas(conn: sqlite3.Connection) -> None:
+    # Lectures analytiques (scans de matches) : pages mappées en mémoire plutôt
+    # que copiées par read(), cache de pages élargi, tris/GROUP BY temporaires en RAM
+    conn.execute("PRAGMA mmap_size=268435456")  # 256 Mo
+    conn.execute("PRAGMA cache_size=-65536")    # 64 Mo
+    conn.execute("PRAGMA temp_store=MEMORY")
+
+
 def init_db() -> None:
     with get_conn() as conn:
         conn.executescript("""
@@ -127,12 +149,25 @@ def init_db() -> None:
             "CREATE INDEX IF NOT EXISTS idx_matches_season "
             "ON matches(season, division_id, game_week)"
         )
+        # Index filtre division + matchs joués (analyses / tirages du goal engine)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_matches_div_score "
+            "ON matches(division_id, home_score)"
+        )
+        # Index couvrant compute_records : les colonnes lues sont toutes dans
+        # l'index, la table (lignes lourdes en raw_json) n'est jamais visitée
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_matches_div_teams "
+            "ON matches(division_id, home_team_id, away_team_id, home_score, away_score)"
+        )
         # Migration teams : ajouter person_id si absent
         try:
             conn.execute("SELECT person_id FROM teams LIMIT 1")
         except sqlite3.OperationalError:
             conn.execute("ALTER TABLE teams ADD COLUMN person_id TEXT")
             print("[DB] Migration teams : colonne person_id ajoutée")
+        # Index filtre H2H (jointures teams → person_id)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_teams_person ON teams(person_id)")
         # Migration divisions_metadata : ajouter is_current si absent
         try:
             conn.execute("SELECT is_current FROM divisions_metadata LIMIT 1")
@@ -7,6 +7,11 @@ import json
 from datetime import datetime, timezone
 from pathlib import Path
 
+try:  # orjson optionnel : décodage raw_json / bonus plus rapide, mêmes dicts Python
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
+
 from mpg_db import get_conn
 from bonus_catalog import BONUS_CATALOG, CONSUMABLE_KEYS
 from mpg_bonuses import compute_remaining_bonuses
@@ -21,7 +26,7 @@ def build_league_export() -> dict:
         row = conn.execute("SELECT raw_json FROM league LIMIT 1").fetchone()
     if not row:
         return {}
-    return json.loads(row["raw_json"])
+    return _loads(row["raw_json"])
 
 
 def build_teams_export(division_id: str) -> list[dict]:
@@ -78,8 +83,8 @@ def build_matches_export(
 
     result = []
     for r in rows:
-        home_bonuses = json.loads(r["home_bonuses"] or "{}")
-        away_bonuses = json.loads(r["away_bonuses"] or "{}")
+        home_bonuses = _loads(r["home_bonuses"] or "{}")
+        away_bonuses = _loads(r["away_bonuses"] or "{}")
         result.append({
             "id":           r["id"],
             "game_week":    r["game_week"],
@@ -96,7 +101,7 @@ def build_matches_export(
                 "score":     r["away_score"],
                 "bonuses":   away_bonuses,
             },
-            "raw_json": json.loads(r["raw_json"] or "{}"),
+            "raw_json": _loads(r["raw_json"] or "{}"),
         })
     return result
 
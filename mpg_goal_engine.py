@@ -31,11 +31,16 @@ Logique de simulation (mode classique, notes MPG) :
 
 from __future__ import annotations
 
-import json
-from collections import defaultdict
+import copy
 from dataclasses import dataclass, field
+from operator import itemgetter
 from typing import Optional
 
+try:  # orjson optionnel : décodage raw_json 2-3× plus rapide, mêmes dicts Python
+    import orjson as _json
+except ImportError:
+    import json as _json
+
 
 # ── Constantes ────────────────────────────────────────────────────────────────
 
@@ -51,10 +56,34 @@ LINES_BY_POS: dict[int, list[str]] = {
     POSITION_DEF: ["fwd", "mid", "def", "gk"],
 }
 
+_LINE_POS = {"gk": POSITION_GK, "def": POSITION_DEF, "mid": POSITION_MID, "fwd": POSITION_FWD}
+
+
+def _line_steps(lines: list[str]) -> tuple[tuple[int, float], ...]:
+    """(poste de la ligne, pénalité cumulée avant de la franchir) pour chaque ligne."""
+    steps, penalty = [], 0.0
+    for i, line in enumerate(lines):
+        steps.append((_LINE_POS[line], penalty))
+        penalty += 1.0 if i == 0 else 0.5
+    return tuple(steps)
+
+
+# LINES_BY_POS pré-calculé en entiers pour la boucle chaude de _simulate_virtual_goal
+_LINE_STEPS: dict[int, tuple[tuple[int, float], ...]] = {
+    pos: _line_steps(lines) for pos, lines in LINES_BY_POS.items()
+}
+
+# Bonus dont simulate_without_bonus sait rejouer l'absence.
+# blockTacticalSubs / fourStrikers : pas de modèle → contrefactuelle = match tel quel.
+MODELED_BONUSES: frozenset[str] = frozenset({
+    "boostOnePlayer", "boostAllPlayers", "nerfGoalkeeper",
+    "nerfAllPlayers", "removeGoal", "mirror",
+})
+
 
 # ── Structures de données ──────────────────────────────────────────────────────
 
-@dataclass
+@dataclass(slots=True)
 class PlayerSlot:
     slot: int                 # 1-11 = titulaire, 12+ = banc
     player_id: str
@@ -79,18 +108,19 @@ class PlayerSlot:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class LineAverages:
     gk:  float = 5.0
     fwd: float = 5.0
     mid: float = 5.0
     def_: float = 5.0   # 'def' est un mot-clé Python
 
-    def get(self, line: str) -> float:
-        return {"gk": self.gk, "fwd": self.fwd, "mid": self.mid, "def": self.def_}[line]
+    def by_pos(self) -> tuple[float, ...]:
+        """Moyennes indexées par poste (POSITION_GK…POSITION_FWD, index 0 inutilisé)."""
+        return (5.0, self.gk, self.def_, self.mid, self.fwd)
 
 
-@dataclass
+@dataclass(slots=True)
 class TeamSimResult:
     real_goals: int = 0
     virtual_goals: int = 0
@@ -105,7 +135,7 @@ class TeamSimResult:
         return self.real_goals + self.virtual_goals + self.own_goals
 
 
-@dataclass
+@dataclass(slots=True)
 class MatchSimResult:
     home: TeamSimResult = field(default_factory=TeamSimResult)
     away: TeamSimResult = field(default_factory=TeamSimResult)
@@ -128,25 +158,26 @@ class MatchSimResult:
 
 # ── Parsing ────────────────────────────────────────────────────────────────────
 
-def _parse_team_starters(team_data: dict) -> list[PlayerSlot]:
-    """Extrait les 11 titulaires (slots 1-11) avec leurs notes effectives."""
-    starters: list[PlayerSlot] = []
+def _parse_team_starters(team_data: dict) -> tuple[list[PlayerSlot], dict[str, PlayerSlot]]:
+    """Extrait les 11 titulaires (slots 1-11) avec leurs notes effectives.
+
+    Retourne (titulaires triés par slot, index {player_id: PlayerSlot}).
+    """
     players_map = team_data.get("players", {})
     pitch = team_data.get("playersOnPitch", {})
 
-    for slot_str, info in pitch.items():
-        slot = int(slot_str)
-        if slot > 11:
-            continue
-        pid = info.get("playerId")
-        if not pid:
-            continue
-        p = players_map.get(pid, {})
-        rating = p.get("rating")
-        if rating is None:
-            continue  # joueur sans note (absent)
-
-        starters.append(PlayerSlot(
+    # (slot, player_id, fiche joueur, isSub) en un seul passage, triés par slot.
+    # Le banc (slots 12+) est écarté sur la chaîne, int() seulement pour les titulaires.
+    raw = [
+        (int(slot_str), pid, players_map.get(pid, {}), info.get("isSub"))
+        for slot_str, info in pitch.items()
+        if (len(slot_str) == 1 or (len(slot_str) == 2 and slot_str <= "11"))
+        and (pid := info.get("playerId"))
+    ]
+    raw.sort(key=itemgetter(0))
+
+    starters = [
+        PlayerSlot(
             slot=slot,
             player_id=pid,
             position=p.get("position", 0),
@@ -155,27 +186,38 @@ def _parse_team_starters(team_data: dict) -> list[PlayerSlot]:
             goals_real=int(p.get("goals") or 0) + int(p.get("canceledGoal") or 0),
             mpg_goals=int(p.get("mpgGoals") or 0),
             last_name=p.get("lastName", ""),
-            is_sub=info.get("isSub"),
-        ))
-
-    return sorted(starters, key=lambda s: s.slot)
+            is_sub=is_sub,
+        )
+        for slot, pid, p, is_sub in raw
+        if (rating := p.get("rating")) is not None  # joueur sans note (absent)
+    ]
+    return starters, {p.player_id: p for p in starters}
 
 
 def _compute_line_averages(starters: list[PlayerSlot]) -> LineAverages:
-    """Moyenne par ligne des notes effectives."""
-    by_pos: dict[int, list[float]] = defaultdict(list)
+    """Moyenne par ligne des notes effectives (sommes courantes, un seul passage)."""
+    gk: Optional[float] = None
+    def_sum = mid_sum = fwd_sum = 0.0
+    def_n = mid_n = fwd_n = 0
     for p in starters:
-        by_pos[p.position].append(p.effective_rating)
-
-    def avg(pos: int) -> float:
-        vals = by_pos.get(pos, [])
-        return sum(vals) / len(vals) if vals else 5.0
+        pos = p.position
+        if pos == POSITION_DEF:
+            def_sum += p.effective_rating
+            def_n += 1
+        elif pos == POSITION_MID:
+            mid_sum += p.effective_rating
+            mid_n += 1
+        elif pos == POSITION_FWD:
+            fwd_sum += p.effective_rating
+            fwd_n += 1
+        elif pos == POSITION_GK and gk is None:
+            gk = p.effective_rating
 
     return LineAverages(
-        gk=by_pos[POSITION_GK][0] if by_pos.get(POSITION_GK) else 5.0,
-        def_=avg(POSITION_DEF),
-        mid=avg(POSITION_MID),
-        fwd=avg(POSITION_FWD),
+        gk=gk if gk is not None else 5.0,
+        def_=def_sum / def_n if def_n else 5.0,
+        mid=mid_sum / mid_n if mid_n else 5.0,
+        fwd=fwd_sum / fwd_n if fwd_n else 5.0,
     )
 
 
@@ -192,8 +234,8 @@ def _count_own_goals(data: dict, side: str) -> int:
     opp = "away" if side == "home" else "home"
     og = 0
     for slot_str, info in data[opp].get("playersOnPitch", {}).items():
-        if int(slot_str) > 11:
-            continue
+        if len(slot_str) > 2 or (len(slot_str) == 2 and slot_str > "11"):
+            continue  # banc (slots 12+), écarté sans int()
         pid = info.get("playerId")
         if pid:
             og += int(data[opp]["players"].get(pid, {}).get("ownGoals") or 0)
@@ -207,19 +249,17 @@ def _can_pass_line(note: float, line_avg: float, is_home: bool) -> bool:
     return note >= line_avg if is_home else note > line_avg
 
 
-def _simulate_virtual_goal(player: PlayerSlot, opp_avgs: LineAverages, is_home: bool) -> bool:
-    """Retourne True si le joueur marque un but virtuel."""
+def _simulate_virtual_goal(player: PlayerSlot, opp_avgs: tuple[float, ...], is_home: bool) -> bool:
+    """Retourne True si le joueur marque un but virtuel.
+
+    opp_avgs : moyennes adverses indexées par poste (LineAverages.by_pos()).
+    """
     if not player.eligible_for_virtual:
         return False
-    lines = LINES_BY_POS.get(player.position, [])
     note = player.effective_rating
-    penalty = 0.0
-    for i, line in enumerate(lines):
-        pen = 1.0 if i == 0 else 0.5
-        avg = opp_avgs.get(line)
-        if not _can_pass_line(note - penalty, avg, is_home):
+    for line_pos, penalty in _LINE_STEPS.get(player.position, ()):
+        if not _can_pass_line(note - penalty, opp_avgs[line_pos], is_home):
             return False
-        penalty += pen
     return True
 
 
@@ -228,6 +268,7 @@ def _simulate_team_goals(
     opp_avgs: LineAverages,
     is_home: bool,
     use_mpg_goals: bool = True,
+    collect_scorer_names: bool = True,
 ) -> TeamSimResult:
     """Simule les buts d'une équipe (réels + virtuels).
 
@@ -235,8 +276,11 @@ def _simulate_team_goals(
 
     use_mpg_goals=True  → utilise mpgGoals du JSON (buts virtuels officiels MPG)
     use_mpg_goals=False → formule probabiliste (pour simulations contrefactuelles)
+    collect_scorer_names=False → virtual_scorers reste vide (analyses en masse,
+        seuls les totaux et virtual_scorer_pids sont utilisés)
     """
     result = TeamSimResult()
+    opp_by_pos = opp_avgs.by_pos()
 
     for p in att_starters:
         if p.goals_real > 0:
@@ -245,29 +289,36 @@ def _simulate_team_goals(
             if p.mpg_goals > 0:
                 result.virtual_goals += p.mpg_goals
                 result.virtual_scorer_pids.add(p.player_id)
-                result.virtual_scorers.append(p.last_name or p.player_id)
+                if collect_scorer_names:
+                    result.virtual_scorers.append(p.last_name or p.player_id)
         else:
-            if _simulate_virtual_goal(p, opp_avgs, is_home):
+            if _simulate_virtual_goal(p, opp_by_pos, is_home):
                 result.virtual_goals += 1
                 result.virtual_scorer_pids.add(p.player_id)
-                result.virtual_scorers.append(p.last_name or p.player_id)
+                if collect_scorer_names:
+                    result.virtual_scorers.append(p.last_name or p.player_id)
 
     return result
 
 
-def simulate_match(raw_json_str: str, use_mpg_goals: bool = True) -> MatchSimResult:
+def simulate_match(
+    raw_json_str: str,
+    use_mpg_goals: bool = True,
+    collect_scorer_names: bool = True,
+) -> MatchSimResult:
     """Simule un match complet depuis son raw_json.
 
     Retourne un MatchSimResult avec les buts réels + virtuels calculés,
     et les scores stockés en DB pour comparaison.
+    collect_scorer_names=False : ne remplit pas virtual_scorers (analyses en masse).
     """
-    data = json.loads(raw_json_str) if isinstance(raw_json_str, str) else raw_json_str
+    data = _json.loads(raw_json_str) if isinstance(raw_json_str, (str, bytes)) else raw_json_str
 
     home_data = data.get("home", {})
     away_data = data.get("away", {})
 
-    h_starters = _parse_team_starters(home_data)
-    a_starters = _parse_team_starters(away_data)
+    h_starters, h_by_pid = _parse_team_starters(home_data)
+    a_starters, a_by_pid = _parse_team_starters(away_data)
 
     if not h_starters or not a_starters:
         return MatchSimResult(
@@ -285,8 +336,8 @@ def simulate_match(raw_json_str: str, use_mpg_goals: bool = True) -> MatchSimRes
     h_rg_pid, h_rg_canceled = _parse_remove_goal(h_bonuses)
     a_rg_pid, a_rg_canceled = _parse_remove_goal(a_bonuses)
 
-    home_result = _simulate_team_goals(h_starters, a_avgs, is_home=True,  use_mpg_goals=use_mpg_goals)
-    away_result = _simulate_team_goals(a_starters, h_avgs, is_home=False, use_mpg_goals=use_mpg_goals)
+    home_result = _simulate_team_goals(h_starters, a_avgs, True,  use_mpg_goals, collect_scorer_names)
+    away_result = _simulate_team_goals(a_starters, h_avgs, False, use_mpg_goals, collect_scorer_names)
 
     # Fix 1 : own goals (CSC des starters adverses bénéficient à cette équipe)
     home_result.own_goals = _count_own_goals(data, "home")
@@ -294,9 +345,9 @@ def simulate_match(raw_json_str: str, use_mpg_goals: bool = True) -> MatchSimRes
 
     # Appliquer removeGoal sur l'équipe cible (home annule un but de away, et vice-versa)
     if h_rg_pid and not h_rg_canceled:
-        _apply_remove_goal(away_result, a_starters, h_rg_pid)
+        _apply_remove_goal(away_result, a_by_pid, h_rg_pid)
     if a_rg_pid and not a_rg_canceled:
-        _apply_remove_goal(home_result, h_starters, a_rg_pid)
+        _apply_remove_goal(home_result, h_by_pid, a_rg_pid)
 
     # Fix 2 : Mirror reflected removeGoal
     # Quand Mirror s'active, il réfléchit le removeGoal sur l'équipe adverse
@@ -305,11 +356,11 @@ def simulate_match(raw_json_str: str, use_mpg_goals: bool = True) -> MatchSimRes
     if "removeGoal" in h_mirror:
         reflected_pid = h_mirror["removeGoal"].get("playerId")
         if reflected_pid:
-            _apply_remove_goal(away_result, a_starters, reflected_pid)
+            _apply_remove_goal(away_result, a_by_pid, reflected_pid)
     if "removeGoal" in a_mirror:
         reflected_pid = a_mirror["removeGoal"].get("playerId")
         if reflected_pid:
-            _apply_remove_goal(home_result, h_starters, reflected_pid)
+            _apply_remove_goal(home_result, h_by_pid, reflected_pid)
 
     result = MatchSimResult(
         home=home_result,
@@ -322,7 +373,7 @@ def simulate_match(raw_json_str: str, use_mpg_goals: bool = True) -> MatchSimRes
 
 def _apply_remove_goal(
     team_result: TeamSimResult,
-    starters: list[PlayerSlot],
+    by_pid: dict[str, PlayerSlot],
     target_pid: str,
 ) -> None:
     """Modifie team_result en place : annule le but du joueur ciblé.
@@ -334,11 +385,11 @@ def _apply_remove_goal(
     team_result.remove_goal_target = target_pid
 
     # But réel du joueur ciblé ?
-    for p in starters:
-        if p.player_id == target_pid:
-            if p.goals_real > 0:
-                team_result.real_goals = max(0, team_result.real_goals - 1)
-            return  # Joueur trouvé dans les starters → on s'arrête ici
+    p = by_pid.get(target_pid)
+    if p is not None:
+        if p.goals_real > 0:
+            team_result.real_goals = max(0, team_result.real_goals - 1)
+        return  # Joueur trouvé dans les starters → on s'arrête ici
 
     # But virtuel du joueur ciblé ? (Fix 4 : lookup par player_id)
     if target_pid in team_result.virtual_scorer_pids:
@@ -353,33 +404,37 @@ def simulate_without_bonus(
     raw_json_str: str,
     side: str,
     bonus_type: str,
+    collect_scorer_names: bool = True,
 ) -> MatchSimResult:
     """Rejoue le match comme si le bonus_type du côté 'side' n'avait pas été utilisé.
 
     Supporte : boostOnePlayer, boostAllPlayers, nerfGoalkeeper, nerfAllPlayers,
-               removeGoal, blockTacticalSubs (approximation), fourStrikers (TODO).
+               removeGoal, mirror (cf. MODELED_BONUSES).
+    Les autres bonus (blockTacticalSubs, fourStrikers) ne sont pas modélisés :
+    le match est simulé tel quel, sans copie des données.
 
     Args:
         raw_json_str: raw_json du match
         side: 'home' ou 'away'
         bonus_type: clé du bonus (ex: 'boostOnePlayer')
+        collect_scorer_names: transmis à simulate_match
 
     Returns:
         MatchSimResult simulé sans le bonus
     """
-    data = json.loads(raw_json_str) if isinstance(raw_json_str, str) else raw_json_str
-    import copy
+    data = _json.loads(raw_json_str) if isinstance(raw_json_str, (str, bytes)) else raw_json_str
+
+    if bonus_type not in data[side].get("bonuses", {}):
+        return simulate_match(data, collect_scorer_names=collect_scorer_names)
+    if bonus_type not in MODELED_BONUSES:
+        return simulate_match(data, use_mpg_goals=False, collect_scorer_names=collect_scorer_names)
+
     data = copy.deepcopy(data)
 
     team = data[side]
     opp_side = "away" if side == "home" else "home"
     opp = data[opp_side]
-    bonuses = team.get("bonuses", {})
-
-    if bonus_type not in bonuses:
-        return simulate_match(data)
-
-    bonus_info = bonuses[bonus_type]
+    bonus_info = team["bonuses"][bonus_type]
 
     # ── boostOnePlayer (+1 à 1 joueur de son équipe) ──
     if bonus_type == "boostOnePlayer":
@@ -412,12 +467,6 @@ def simulate_without_bonus(
         # Supprimer le bonus — la simulation n'appliquera plus le removeGoal
         del team["bonuses"]["removeGoal"]
 
-    # ── blockTacticalSubs (approximation : on revert les subs tactiques) ──
-    elif bonus_type == "blockTacticalSubs":
-        # Note : approximation — on ne peut pas reconstruire exactement
-        # l'équipe adverse sans les subs tactiques sans données additionnelles
-        pass
-
     # ── mirror (annule le removeGoal adverse + réfléchit) ──
     elif bonus_type == "mirror":
         del team["bonuses"]["mirror"]
@@ -426,7 +475,7 @@ def simulate_without_bonus(
         if "removeGoal" in opp_bonuses:
             opp_bonuses["removeGoal"].pop("isCanceled", None)
 
-    return simulate_match(data, use_mpg_goals=False)
+    return simulate_match(data, use_mpg_goals=False, collect_scorer_names=collect_scorer_names)
 
 
 # ── Analyse de l'impact des bonus ─────────────────────────────────────────────
@@ -462,35 +511,33 @@ def analyze_bonus_impact(
         WHERE dm.is_covid=0 AND dm.is_current=0
         AND m.home_score IS NOT NULL
     """
+    params: tuple = ()
     if max_matches:
-        query += f" LIMIT {max_matches}"
-
-    rows = conn.execute(query).fetchall()
+        query += " LIMIT ?"
+        params = (max_matches,)
 
-    def _outcome(g: int, opp: int) -> str:
-        """Retourne 'W', 'D' ou 'L' du point de vue de g."""
-        if g > opp: return "W"
-        if g < opp: return "L"
-        return "D"
+    rows = conn.execute(query, params).fetchall()
 
     results: dict[str, dict] = {bt: {
-        "n": 0, "delta_goals": [],
-        "w_with": 0, "d_with": 0, "l_with": 0,
-        "w_without": 0, "d_without": 0, "l_without": 0,
+        "n": 0, "delta_sum": 0, "delta_positive": 0,
+        # Compteurs indexés par signe(buts - buts adverses) + 1 : [L, D, W]
+        "with": [0, 0, 0], "without": [0, 0, 0],
         "result_changed": 0,
     } for bt in bonus_types}
 
     for row in rows:
-        data = json.loads(row["raw_json"])
+        data = _json.loads(row["raw_json"])
+        with_result = None  # identique pour tous les bonus du match → calculé une fois
         for side in ("home", "away"):
             team_bonuses = data[side].get("bonuses", {})
             for bt in bonus_types:
-                if bt not in team_bonuses:
+                if bt not in team_bonuses or bt not in MODELED_BONUSES:
                     continue
                 # Avec bonus : simulation mpgGoals (vérité terrain)
                 # Sans bonus : simulation probabiliste (modèle contrefactuel)
-                with_result    = simulate_match(data, use_mpg_goals=True)
-                without_result = simulate_without_bonus(data, side, bt)
+                if with_result is None:
+                    with_result = simulate_match(data, use_mpg_goals=True, collect_scorer_names=False)
+                without_result = simulate_without_bonus(data, side, bt, collect_scorer_names=False)
 
                 if side == "home":
                     goals_with    = with_result.home.total_goals
@@ -504,16 +551,16 @@ def analyze_bonus_impact(
                     opp_without   = without_result.home.total_goals
 
                 delta = (goals_with - opp_with) - (goals_without - opp_without)
-                outcome_with    = _outcome(goals_with, opp_with)
-                outcome_without = _outcome(goals_without, opp_without)
-                result_changed  = outcome_with != outcome_without
+                sign_with    = (goals_with > opp_with) - (goals_with < opp_with)
+                sign_without = (goals_without > opp_without) - (goals_without < opp_without)
 
                 r = results[bt]
                 r["n"] += 1
-                r["delta_goals"].append(delta)
-                r[f"{outcome_with.lower()}_with"]    += 1
-                r[f"{outcome_without.lower()}_without"] += 1
-                if result_changed: r["result_changed"] += 1
+                r["delta_sum"] += delta
+                if delta > 0: r["delta_positive"] += 1
+                r["with"][sign_with + 1]       += 1
+                r["without"][sign_without + 1] += 1
+                if sign_with != sign_without: r["result_changed"] += 1
 
     # Agrégation
     final: dict[str, dict] = {}
@@ -521,17 +568,18 @@ def analyze_bonus_impact(
         n = r["n"]
         if n == 0:
             continue
-        deltas = r["delta_goals"]
+        l_with, d_with, w_with = r["with"]
+        l_without, d_without, w_without = r["without"]
         final[bt] = {
             "n_matches":          n,
-            "avg_goal_delta":     sum(deltas) / n,
-            "pct_positive_delta": sum(1 for d in deltas if d > 0) / n * 100,
-            "win_rate_with":      r["w_with"] / n * 100,
-            "draw_rate_with":     r["d_with"] / n * 100,
-            "loss_rate_with":     r["l_with"] / n * 100,
-            "win_rate_without":   r["w_without"] / n * 100,
-            "draw_rate_without":  r["d_without"] / n * 100,
-            "loss_rate_without":  r["l_without"] / n * 100,
+            "avg_goal_delta":     r["delta_sum"] / n,
+            "pct_positive_delta": r["delta_positive"] / n * 100,
+            "win_rate_with":      w_with / n * 100,
+            "draw_rate_with":     d_with / n * 100,
+            "loss_rate_with":     l_with / n * 100,
+            "win_rate_without":   w_without / n * 100,
+            "draw_rate_without":  d_without / n * 100,
+            "loss_rate_without":  l_without / n * 100,
             "result_changed_pct": r["result_changed"] / n * 100,
         }
     return final
@@ -578,19 +626,23 @@ def print_bonus_impact_report(impact: dict[str, dict]) -> None:
 
 def validate(conn, n: int = 500, verbose: bool = False) -> dict:
     """Compare les scores simulés aux scores réels sur n matchs aléatoires."""
-    rows = conn.execute(f"""
-        SELECT raw_json, home_score, away_score FROM matches m
-        JOIN divisions_metadata dm ON m.division_id = dm.division_id
-        WHERE dm.is_covid=0 AND dm.is_current=0
-        AND m.home_score IS NOT NULL
-        ORDER BY RANDOM() LIMIT {n}
-    """).fetchall()
+    # Tirage sur les rowid seuls : ORDER BY RANDOM() ne trie pas les raw_json
+    rows = conn.execute("""
+        SELECT raw_json, home_score, away_score FROM matches
+        WHERE rowid IN (
+            SELECT m.rowid FROM matches m
+            JOIN divisions_metadata dm ON m.division_id = dm.division_id
+            WHERE dm.is_covid=0 AND dm.is_current=0
+            AND m.home_score IS NOT NULL
+            ORDER BY RANDOM() LIMIT ?
+        )
+    """, (n,)).fetchall()
 
     exact = near = wrong = 0
     diffs: list[float] = []
 
     for row in rows:
-        r = simulate_match(row["raw_json"])
+        r = simulate_match(row["raw_json"], collect_scorer_names=False)
         if r.home_score_actual is None:
             continue
         dh = abs(r.home.total_goals - int(r.home_score_actual))
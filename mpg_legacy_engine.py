@@ -20,20 +20,28 @@ Ordre déterministe : season ASC, division_id ASC, game_week ASC, match_id ASC.
 Propriété zero-sum : Σ ratings = N × 1500 (invariant).
 """
 
+import hashlib
 import json
+import math
+import sys
+from array import array
 from collections import defaultdict
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import Iterator, NamedTuple
 
-import yaml
-
-from mpg_db import get_conn
-from mpg_people import DEFAULT_MAPPING_PATH, load_people_mapping, normalize_team_name
+from mpg_db import DB_PATH, get_conn
+from mpg_people import (
+    DEFAULT_MAPPING_PATH, load_people_mapping, normalize_team_name, read_people_yaml,
+)
 
 
 # ── helpers internes ──────────────────────────────────────────────────────────
 
 def _load_display_names() -> dict[str, str]:
     """Retourne {person_id: display_name} depuis people_mapping.yaml."""
-    data = yaml.safe_load(DEFAULT_MAPPING_PATH.read_text(encoding="utf-8"))
+    data = read_people_yaml(DEFAULT_MAPPING_PATH)
     return {
         pid: info.get("display_name", pid)
         for pid, info in data.get("persons", {}).items()
@@ -49,7 +57,7 @@ def resolve_person_id(name: str) -> str | None:
     3. alias normalisé via people_mapping.yaml (ex: « San Chapo FC »)
     """
     name_stripped = name.strip()
-    data = yaml.safe_load(DEFAULT_MAPPING_PATH.read_text(encoding="utf-8"))
+    data = read_people_yaml(DEFAULT_MAPPING_PATH)
     persons = data.get("persons", {})
 
     for pid in persons:
@@ -72,25 +80,75 @@ def resolve_person_id(name: str) -> str | None:
 def _empty_record() -> dict:
     return {
         "wins": 0, "draws": 0, "losses": 0, "points": 0,
-        "goals_for": 0.0, "goals_against": 0.0, "matches_played": 0,
+        "goals_for": 0, "goals_against": 0, "matches_played": 0,
     }
 
 
+# (compteur, points) indexé par (outcome << 1) | is_home — index 0/1 inutilisés
+_OUTCOME_TABLE: tuple = (
+    None,            None,
+    ("losses", 0),   ("wins", 3),     # outcome 1 : victoire domicile
+    ("draws", 1),    ("draws", 1),    # outcome 2 : nul
+    ("wins", 3),     ("losses", 0),   # outcome 3 : victoire extérieur
+)
+
+
 def _apply_result(
-    record: dict, is_home: bool, gf: float, ga: float, outcome: int
+    record: dict, is_home: bool, gf: int, ga: int, outcome: int
 ) -> None:
     """Met à jour W/D/L/Pts/BP/BC (outcome : 1=home win, 2=draw, 3=away win)."""
+    key, pts = _OUTCOME_TABLE[(outcome << 1) | is_home]
     record["matches_played"] += 1
     record["goals_for"]      += gf
     record["goals_against"]  += ga
-    if outcome == 2:
-        record["draws"]  += 1
-        record["points"] += 1
-    elif (outcome == 1 and is_home) or (outcome == 3 and not is_home):
-        record["wins"]   += 1
-        record["points"] += 3
-    else:
-        record["losses"] += 1
+    record[key]              += 1
+    record["points"]         += pts
+
+
+# 10^(x/400) = exp(x · ln(10)/400) : exp est plus rapide que pow
+_Q = math.log(10) / 400.0
+
+
+def _elo_kernel(
+    h_idx: list[int], a_idx: list[int], s_h: list[float], k: float, ratings: list[float]
+) -> list[float]:
+    """Boucle ELO séquentielle sur index entiers (ordre des matchs imposé).
+
+    h_idx/a_idx : index joueur domicile/extérieur, s_h : score domicile (1/0.5/0).
+    ratings : ratings de départ (1500 ou état repris), mis à jour en place.
+    Retourne les ratings finaux indexés comme h_idx/a_idx.
+    """
+    exp = math.exp
+    for h, a, score_h in zip(h_idx, a_idx, s_h):
+        r_h, r_a = ratings[h], ratings[a]
+        exp_h = 1.0 / (1.0 + exp(_Q * (r_a - r_h)))
+        # Δ_away = -Δ_home : zero-sum exact
+        delta = k * (score_h - exp_h)
+        ratings[h] = r_h + delta
+        ratings[a] = r_a - delta
+    return ratings
+
+
+# Cache des lectures (divisions incluses, matchs) pour la connexion courante :
+# palmarès + classements + ELO + séries sur une même connexion ne relisent la
+# DB qu'une fois. Vidé dès qu'une autre connexion est utilisée, ou via clear_cache().
+_CACHE_CONN = None
+_CACHE: dict[tuple, object] = {}
+
+
+def _cache_for(conn) -> dict[tuple, object]:
+    global _CACHE_CONN
+    if conn is not _CACHE_CONN:
+        _CACHE.clear()
+        _CACHE_CONN = conn
+    return _CACHE
+
+
+def clear_cache() -> None:
+    """Vide le cache fetch_matches / list_included_divisions (ex: après un sync)."""
+    global _CACHE_CONN
+    _CACHE.clear()
+    _CACHE_CONN = None
 
 
 # ── API publique ──────────────────────────────────────────────────────────────
@@ -101,7 +159,22 @@ def list_included_divisions(
     include_incomplete: bool = False,
     include_current: bool = False,
 ) -> list[str]:
-    """Retourne les division_ids validées selon les flags d'inclusion."""
+    """Retourne les division_ids validées selon les flags d'inclusion.
+
+    Résultat mis en cache pour la connexion (cf. clear_cache).
+    """
+    cache = _cache_for(conn)
+    key = ("divisions", include_covid, include_incomplete, include_current)
+    if key not in cache:
+        cache[key] = _query_included_divisions(
+            conn, include_covid, include_incomplete, include_current
+        )
+    return list(cache[key])
+
+
+def _query_included_divisions(
+    conn, include_covid: bool, include_incomplete: bool, include_current: bool
+) -> list[str]:
     clauses = ["1=1"]
     if not include_covid:
         clauses.append("is_covid=0")
@@ -116,64 +189,145 @@ def list_included_divisions(
     return [r["division_id"] for r in rows]
 
 
-def fetch_matches(conn, division_ids: list[str]) -> list[dict]:
-    """Charge les matchs joués des divisions demandées.
+class MatchColumns(NamedTuple):
+    """Matchs joués en colonnes parallèles (même ordre que fetch_matches).
 
-    L'outcome est dérivé des scores réels (le champ finalResult du JSON MPG
-    vaut toujours 1, il est donc ignoré) :
+    final_result : 1=home win, 2=draw, 3=away win (dérivé des scores).
+    """
+    match_id:       list[str]
+    season:         list[int]
+    division_id:    list[str]
+    game_week:      list[int]
+    home_score:     list[int]
+    away_score:     list[int]
+    home_person_id: list[str | None]
+    away_person_id: list[str | None]
+    final_result:   list[int]
+
+    def as_dicts(self) -> list[dict]:
+        """Vue ligne par ligne : [{match_id, season, …, final_result}]."""
+        return [dict(zip(self._fields, row)) for row in zip(*self)]
+
+
+def fetch_match_columns(conn, division_ids: list[str]) -> MatchColumns:
+    """Charge les matchs joués des divisions demandées, en colonnes.
+
+    L'outcome est dérivé des scores réels par SQLite (CASE), le champ
+    finalResult du JSON MPG valant toujours 1 :
       home_score > away_score → 1 (home win)
       home_score < away_score → 3 (away win)
       home_score = away_score → 2 (draw)
 
     Seuls les matchs avec home_score ET away_score non nuls sont inclus.
-    Retourne une liste triée (season, division_id, game_week, match_id) pour
+    Colonnes triées (season, division_id, game_week, match_id) pour
     garantir l'ordre déterministe requis par l'ELO.
+
+    Résultat mis en cache pour la connexion (cf. clear_cache) : les listes sont
+    partagées entre appelants et ne doivent pas être modifiées.
+    """
+    cache = _cache_for(conn)
+    key = ("columns", tuple(sorted(division_ids)))
+    if key not in cache:
+        cache[key] = _query_match_columns(conn, division_ids)
+    return cache[key]
+
+
+def fetch_matches(
+    conn,
+    division_ids: list[str],
+    person_filter: tuple[str, str] | None = None,
+) -> list[dict]:
+    """Comme fetch_match_columns, mais une liste de dicts par match.
+
+    person_filter=(a, b) restreint côté SQL aux confrontations a/b (dans les
+    deux sens) : quelques dizaines de lignes, non mises en cache.
+
+    Sinon résultat mis en cache pour la connexion (cf. clear_cache) : la liste
+    est partagée entre appelants et ne doit pas être modifiée.
     """
     if not division_ids:
         return []
+    if person_filter is not None:
+        return _query_match_columns(conn, division_ids, person_filter).as_dicts()
+
+    cache = _cache_for(conn)
+    key = ("matches", tuple(sorted(division_ids)))
+    if key not in cache:
+        cache[key] = fetch_match_columns(conn, division_ids).as_dicts()
+    return cache[key]
+
+
+def iter_matches(
+    conn,
+    division_ids: list[str],
+    person_filter: tuple[str, str] | None = None,
+    after: tuple | None = None,
+) -> Iterator[tuple]:
+    """Itère les matchs joués sans les matérialiser (curseur SQLite).
+
+    Chaque élément suit l'ordre des champs de MatchColumns (accès par
+    position) et l'ordre (season, division_id, game_week, match_id).
+    person_filter : cf. fetch_matches.
+    after : clé (season, division_id, game_week, match_id) ; seuls les
+    matchs strictement postérieurs sont renvoyés (reprise incrémentale).
+    Pas de cache : pour les agrégats en une passe dont le résultat seul est
+    conservé.
+    """
+    if not division_ids:
+        return
 
     ph = ",".join("?" * len(division_ids))
-    rows = conn.execute(f"""
+    params: list = list(division_ids)
+    person_sql = ""
+    if person_filter is not None:
+        a, b = person_filter
+        person_sql = (
+            "AND ((ht.person_id = ? AND at.person_id = ?)"
+            " OR (ht.person_id = ? AND at.person_id = ?))"
+        )
+        params += [a, b, b, a]
+    after_sql = ""
+    if after is not None:
+        after_sql = "AND (m.season, m.division_id, m.game_week, m.id) > (?, ?, ?, ?)"
+        params += list(after)
+    yield from conn.execute(f"""
         SELECT
             m.id            AS match_id,
             m.season,
             m.division_id,
             m.game_week,
-            m.home_score,
-            m.away_score,
+            CAST(m.home_score AS INTEGER) AS home_score,
+            CAST(m.away_score AS INTEGER) AS away_score,
             ht.person_id    AS home_person_id,
-            at.person_id    AS away_person_id
+            at.person_id    AS away_person_id,
+            CASE
+                WHEN m.home_score > m.away_score THEN 1
+                WHEN m.away_score > m.home_score THEN 3
+                ELSE 2
+            END             AS final_result
         FROM matches m
         LEFT JOIN teams ht ON m.home_team_id = ht.id
         LEFT JOIN teams at ON m.away_team_id = at.id
         WHERE m.division_id IN ({ph})
           AND m.home_score IS NOT NULL
           AND m.away_score IS NOT NULL
+          {person_sql}
+          {after_sql}
         ORDER BY m.season ASC, m.division_id ASC, m.game_week ASC, m.id ASC
-    """, division_ids).fetchall()
+    """, params)
 
-    result = []
-    for r in rows:
-        hs  = float(r["home_score"])
-        as_ = float(r["away_score"])
-        if hs > as_:
-            outcome = 1
-        elif as_ > hs:
-            outcome = 3
-        else:
-            outcome = 2
-        result.append({
-            "match_id":       r["match_id"],
-            "season":         r["season"],
-            "division_id":    r["division_id"],
-            "game_week":      r["game_week"],
-            "home_score":     hs,
-            "away_score":     as_,
-            "home_person_id": r["home_person_id"],
-            "away_person_id": r["away_person_id"],
-            "final_result":   outcome,
-        })
-    return result
+
+def _query_match_columns(
+    conn,
+    division_ids: list[str],
+    person_filter: tuple[str, str] | None = None,
+) -> MatchColumns:
+    rows = list(iter_matches(conn, division_ids, person_filter))
+    if not rows:
+        return MatchColumns(*([] for _ in MatchColumns._fields))
+
+    # Transposition lignes → colonnes (zip en C, aucun post-traitement Python)
+    return MatchColumns(*map(list, zip(*rows)))
 
 
 def compute_mpg_season_standings(
@@ -196,7 +350,22 @@ def compute_mpg_season_standings(
        goals_for, goals_against, goal_diff, avg_pts}
 
     avg_pts = points / matches_played  (MoyPts, pas moyenne de buts).
+
+    Résultat mis en cache pour la connexion (cf. clear_cache) : partagé entre
+    appelants (palmarès + rapport sur une même connexion), ne pas le modifier.
     """
+    cache = _cache_for(conn)
+    key = ("standings", include_covid, include_incomplete, include_current)
+    if key not in cache:
+        cache[key] = _aggregate_season_standings(
+            conn, include_covid, include_incomplete, include_current
+        )
+    return cache[key]
+
+
+def _aggregate_season_standings(
+    conn, include_covid: bool, include_incomplete: bool, include_current: bool
+) -> dict[str, dict]:
     divisions = list_included_divisions(conn, include_covid, include_incomplete, include_current)
     if not divisions:
         return {}
@@ -211,28 +380,38 @@ def compute_mpg_season_standings(
         for r in meta
     }
 
-    matches = fetch_matches(conn, divisions)
-
+    # Agrégation en flux sur le curseur : ni liste de matchs ni colonnes
+    # matérialisées. Records créés à la première apparition (l'ordre
+    # d'insertion départage les ex-aequo au tri final).
     # div_standings[division_id][person_id] = record
-    div_standings: dict = defaultdict(lambda: defaultdict(_empty_record))
-    for m in matches:
-        div = m["division_id"]
-        hp, ap = m["home_person_id"], m["away_person_id"]
+    div_standings: dict[str, dict[str, dict]] = {}
+    for _, _, div, _, hs, as_, hp, ap, fr in iter_matches(conn, divisions):
         if not hp or not ap:
             continue
-        _apply_result(div_standings[div][hp], True,  m["home_score"], m["away_score"], m["final_result"])
-        _apply_result(div_standings[div][ap], False, m["away_score"], m["home_score"], m["final_result"])
+        records = div_standings.get(div)
+        if records is None:
+            records = div_standings[div] = {}
+        rec_h = records.get(hp)
+        if rec_h is None:
+            rec_h = records[hp] = _empty_record()
+        rec_a = records.get(ap)
+        if rec_a is None:
+            rec_a = records[ap] = _empty_record()
+        _apply_result(rec_h, True,  hs, as_, fr)
+        _apply_result(rec_a, False, as_, hs, fr)
 
     result: dict[str, dict] = {}
-    # Ordre chronologique : season ASC, division_id ASC
-    for div in sorted(divisions, key=lambda d: (div_info.get(d, {}).get("season", 0), d)):
+    # Ordre chronologique (season ASC, division_id ASC) : déjà celui de
+    # list_included_divisions (ORDER BY SQL), aucun tri à refaire ici.
+    # div_info couvre toutes les divisions (même table divisions_metadata).
+    for div in divisions:
         if div not in div_standings:
             continue
-        info      = div_info.get(div, {})
-        n_matches = info.get("n_matches", 0)
+        info      = div_info[div]
+        n_matches = info["n_matches"] or 0
         rows = []
-        for person_id, s in div_standings[div].items():
-            row = dict(s)
+        # Records privés à cette fonction : complétés en place, sans copie
+        for person_id, row in div_standings[div].items():
             row["person_id"] = person_id
             row["goal_diff"] = row["goals_for"] - row["goals_against"]
             mp = row["matches_played"]
@@ -240,7 +419,7 @@ def compute_mpg_season_standings(
             rows.append(row)
         rows.sort(key=lambda r: (-r["points"], -r["goal_diff"], -r["goals_for"]))
         result[div] = {
-            "season":      info.get("season"),
+            "season":      info["season"],
             "n_matches":   n_matches,
             "is_complete": n_matches >= 56 and len(rows) >= 8,
             "standings":   rows,
@@ -268,10 +447,18 @@ def compute_palmares(
     """
     mpg_standings = compute_mpg_season_standings(conn, include_covid, include_incomplete)
 
-    palmares: dict[str, dict] = defaultdict(lambda: {
-        "titles": 0, "podiums": 0, "chapeaux": 0, "seasons_played": 0,
-        "all_time_points": 0, "all_time_matches": 0, "all_time_goals_for": 0.0,
-    })
+    # Pré-allocation dans l'ordre de première apparition (départage au tri)
+    palmares: dict[str, dict] = {
+        pid: {
+            "titles": 0, "podiums": 0, "chapeaux": 0, "seasons_played": 0,
+            "all_time_points": 0, "all_time_matches": 0, "all_time_goals_for": 0,
+        }
+        for pid in dict.fromkeys(
+            row["person_id"]
+            for data in mpg_standings.values()
+            for row in data["standings"]
+        )
+    }
 
     for div, data in mpg_standings.items():
         rows        = data["standings"]
@@ -296,8 +483,7 @@ def compute_palmares(
                     p["chapeaux"] += 1
 
     result = []
-    for pid, p in palmares.items():
-        row = dict(p)
+    for pid, row in palmares.items():
         row["person_id"]        = pid
         m = row["all_time_matches"]
         row["all_time_avg_pts"] = round(row["all_time_points"] / m, 2) if m else 0.0
@@ -322,15 +508,16 @@ def compute_head_to_head(
        away_a: {n, wins, draws, losses, goals_for, goals_against}}
     """
     divisions = list_included_divisions(conn, include_covid, include_incomplete)
-    matches   = fetch_matches(conn, divisions)
+    # Filtre a/b poussé dans le SQL : seules les confrontations remontent
+    matches   = fetch_matches(conn, divisions, person_filter=(person_a, person_b))
 
     def _side() -> dict:
         return {"n": 0, "wins": 0, "draws": 0, "losses": 0,
-                "goals_for": 0.0, "goals_against": 0.0}
+                "goals_for": 0, "goals_against": 0}
 
     stats: dict = {
         "n_matches": 0, "a_wins": 0, "a_draws": 0, "a_losses": 0,
-        "a_goals": 0.0, "b_goals": 0.0, "goal_diff": 0.0,
+        "a_goals": 0, "b_goals": 0, "goal_diff": 0,
         "home_a": _side(), "away_a": _side(),
     }
 
@@ -368,7 +555,7 @@ def compute_head_to_head(
         side["goals_for"]     += gf_a
         side["goals_against"] += gf_b
 
-    stats["goal_diff"] = round(stats["a_goals"] - stats["b_goals"], 2)
+    stats["goal_diff"] = stats["a_goals"] - stats["b_goals"]
     return stats
 
 
@@ -377,6 +564,7 @@ def compute_elo(
     k: int = 20,
     include_covid: bool = False,
     include_incomplete: bool = False,
+    cache_path: Path | None = None,
 ) -> dict[str, dict]:
     """Ratings ELO all-time par person_id.
 
@@ -384,56 +572,200 @@ def compute_elo(
     Traitement chronologique : season ASC, division_id ASC, game_week ASC, match_id ASC.
     Propriété zero-sum : Σ ratings = N × 1500 (invariant garanti par la symétrie des updates).
 
+    cache_path : si fourni, reprend l'état persisté (cf. _load_elo_cache) et
+    ne rejoue que les matchs postérieurs, puis réécrit l'état.
+
     Retourne {person_id: {rating, matches_played, wins, draws, losses}}.
     """
     divisions = list_included_divisions(conn, include_covid, include_incomplete)
-    matches   = fetch_matches(conn, divisions)
-
-    ratings: dict[str, float] = defaultdict(lambda: 1500.0)
-    records: dict[str, dict]  = defaultdict(
-        lambda: {"wins": 0, "draws": 0, "losses": 0, "matches_played": 0}
-    )
+    state = None
+    if cache_path is not None:
+        state = _load_elo_cache(cache_path, conn, divisions, k, include_covid, include_incomplete)
+
+    # Index entier dense par person_id : ratings et compteurs en listes plates,
+    # la boucle séquentielle ne fait plus que des accès par position.
+    pid_idx: dict[str, int] = {}
+    ratings: list[float] = []
+    wins: list[int] = []
+    draws: list[int] = []
+    losses: list[int] = []
+    if state is not None:
+        for pid, (r, w, d, l) in state["players"].items():
+            pid_idx[pid] = len(pid_idx)
+            ratings.append(r); wins.append(w); draws.append(d); losses.append(l)
+        hwm = tuple(state["hwm"])
+        # Même ordre de champs que la branche colonnes : la clé hwm en dépend
+        rows = [
+            (r["season"], r["division_id"], r["game_week"], r["match_id"],
+             r["home_person_id"], r["away_person_id"], r["final_result"])
+            for r in iter_matches(conn, divisions, after=hwm)
+        ]
+    else:
+        hwm = None
+        cols = fetch_match_columns(conn, divisions)
+        rows = zip(
+            cols.season, cols.division_id, cols.game_week, cols.match_id,
+            cols.home_person_id, cols.away_person_id, cols.final_result,
+        )
 
-    for m in matches:
-        hp, ap = m["home_person_id"], m["away_person_id"]
+    h_idx: list[int] = []
+    a_idx: list[int] = []
+    s_h:   list[float] = []
+    for season, div, gw, match_id, hp, ap, fr in rows:
+        hwm = (season, div, gw, match_id)
         if not hp or not ap:
             continue
+        for pid in (hp, ap):
+            if pid not in pid_idx:
+                pid_idx[pid] = len(pid_idx)
+                ratings.append(1500.0)
+                wins.append(0); draws.append(0); losses.append(0)
+        h, a = pid_idx[hp], pid_idx[ap]
+        h_idx.append(h)
+        a_idx.append(a)
 
-        r_h, r_a = ratings[hp], ratings[ap]
-        exp_h = 1.0 / (1.0 + 10.0 ** ((r_a - r_h) / 400.0))
-
-        fr = m["final_result"]
         if fr == 1:
-            score_h, score_a = 1.0, 0.0
+            s_h.append(1.0)
+            wins[h]   += 1; losses[a] += 1
         elif fr == 2:
-            score_h, score_a = 0.5, 0.5
+            s_h.append(0.5)
+            draws[h]  += 1; draws[a]  += 1
         else:
-            score_h, score_a = 0.0, 1.0
+            s_h.append(0.0)
+            losses[h] += 1; wins[a]   += 1
 
-        ratings[hp] = r_h + k * (score_h - exp_h)
-        ratings[ap] = r_a + k * (score_a - (1.0 - exp_h))
+    ratings = _elo_kernel(h_idx, a_idx, s_h, k, ratings)
 
-        records[hp]["matches_played"] += 1
-        records[ap]["matches_played"] += 1
-        if fr == 1:
-            records[hp]["wins"]   += 1; records[ap]["losses"] += 1
-        elif fr == 2:
-            records[hp]["draws"]  += 1; records[ap]["draws"]  += 1
-        else:
-            records[hp]["losses"] += 1; records[ap]["wins"]   += 1
+    if cache_path is not None and hwm is not None:
+        _save_elo_cache(cache_path, conn, divisions, k, include_covid, include_incomplete, hwm, {
+            pid: [ratings[i], wins[i], draws[i], losses[i]] for pid, i in pid_idx.items()
+        })
 
     return {
         pid: {
-            "rating":         round(ratings[pid], 1),
-            "matches_played": records[pid]["matches_played"],
-            "wins":           records[pid]["wins"],
-            "draws":          records[pid]["draws"],
-            "losses":         records[pid]["losses"],
+            "rating":         round(ratings[i], 1),
+            "matches_played": wins[i] + draws[i] + losses[i],
+            "wins":           wins[i],
+            "draws":          draws[i],
+            "losses":         losses[i],
         }
-        for pid in set(records)
+        for pid, i in pid_idx.items()
     }
 
 
+# État ELO persisté entre deux invocations CLI : les matchs arrivent en fin de
+# chronologie, seule la queue postérieure au dernier match traité (hwm) est
+# rejouée. L'état est invalidé si k / les flags changent, si le nombre de
+# matchs joués ≤ hwm d'une division a bougé (ajout tardif, suppression), ou si
+# le mapping équipe → person_id des divisions incluses a changé (--apply-mapping :
+# des matchs ignorés faute de person_id deviennent comptables).
+# Une correction de score sans changement de volume n'est pas détectée :
+# supprimer le fichier pour forcer un recalcul complet.
+ELO_CACHE_PATH = DB_PATH.with_name("elo_cache.json")
+_ELO_CACHE_VERSION = 3
+
+
+def _elo_prefix_counts(conn, divisions: list[str], hwm: tuple) -> dict[str, int]:
+    """{division_id: nb de matchs joués de clé ≤ hwm} (divisions non vides)."""
+    if not divisions:
+        return {}
+    ph = ",".join("?" * len(divisions))
+    rows = conn.execute(f"""
+        SELECT division_id, COUNT(*) FROM matches m
+        WHERE m.division_id IN ({ph})
+          AND m.home_score IS NOT NULL
+          AND m.away_score IS NOT NULL
+          AND (m.season, m.division_id, m.game_week, m.id) <= (?, ?, ?, ?)
+        GROUP BY m.division_id
+    """, [*divisions, *hwm]).fetchall()
+    return {div: n for div, n in rows}
+
+
+def _elo_mapping_digest(conn, divisions: list[str]) -> str:
+    """Empreinte du mapping équipe → person_id des divisions incluses."""
+    digest = hashlib.sha1()
+    if divisions:
+        ph = ",".join("?" * len(divisions))
+        for team_id, person_id in conn.execute(f"""
+            SELECT id, person_id FROM teams
+            WHERE division_id IN ({ph})
+            ORDER BY id
+        """, divisions):
+            digest.update(f"{team_id}\x1f{person_id or ''}\x1e".encode())
+    return digest.hexdigest()
+
+
+def _load_elo_cache(
+    path: Path, conn, divisions: list[str], k: int,
+    include_covid: bool, include_incomplete: bool,
+) -> dict | None:
+    """État ELO persisté s'il est encore valide pour cette DB, sinon None."""
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if (
+        state.get("version") != _ELO_CACHE_VERSION
+        or state.get("k") != k
+        or state.get("include_covid") != include_covid
+        or state.get("include_incomplete") != include_incomplete
+        or not state.get("hwm")
+    ):
+        return None
+    if _elo_prefix_counts(conn, divisions, tuple(state["hwm"])) != state.get("div_counts"):
+        return None
+    if _elo_mapping_digest(conn, divisions) != state.get("mapping"):
+        return None
+    return state
+
+
+def _save_elo_cache(
+    path: Path, conn, divisions: list[str], k: int,
+    include_covid: bool, include_incomplete: bool,
+    hwm: tuple, players: dict[str, list],
+) -> None:
+    """Persiste l'état ELO brut (ratings non arrondis) ; échec d'écriture ignoré."""
+    state = {
+        "version":            _ELO_CACHE_VERSION,
+        "k":                  k,
+        "include_covid":      include_covid,
+        "include_incomplete": include_incomplete,
+        "hwm":                list(hwm),
+        "div_counts":         _elo_prefix_counts(conn, divisions, hwm),
+        "mapping":            _elo_mapping_digest(conn, divisions),
+        "players":            players,
+    }
+    try:
+        path.write_text(json.dumps(state), encoding="utf-8")
+    except OSError as e:
+        print(f"[ELO] Cache non écrit ({path}) : {e}")
+
+
+_STREAK_LABELS = {1: "W", 0: "D", -1: "L"}
+
+
+def _run_lengths(keys) -> list[tuple]:
+    """Run-length encoding : [(clé, index de début, longueur)] dans l'ordre."""
+    runs, i = [], 0
+    for key, grp in groupby(keys):
+        length = len(list(grp))
+        runs.append((key, i, length))
+        i += length
+    return runs
+
+
+def _best_run(runs: list[tuple]) -> tuple[int, int, int]:
+    """Plus longue suite de True (la première en cas d'égalité).
+
+    Retourne (longueur, index début, index fin) ou (0, -1, -1).
+    """
+    best = max((r for r in runs if r[0]), key=itemgetter(2), default=None)
+    if best is None:
+        return 0, -1, -1
+    _, si, length = best
+    return length, si, si + length - 1
+
+
 def compute_streaks(
     conn,
     include_covid: bool = False,
@@ -458,116 +790,78 @@ def compute_streaks(
     Les *_start/*_end sont {season, division_id, game_week} ou None.
     *_ongoing = True si la meilleure série se termine au dernier match connu.
     Les séries enjambent les divisions (continuité chronologique garantie par
-    fetch_matches ORDER BY season, division_id, gw, id).
+    fetch_match_columns ORDER BY season, division_id, gw, id).
     """
     if division_ids is None:
         division_ids = list_included_divisions(
             conn, include_covid, include_incomplete, include_current
         )
-    matches = fetch_matches(conn, division_ids)
-
-    seq_by_player: dict[str, list] = defaultdict(list)
-    for m in matches:
-        hp, ap = m["home_person_id"], m["away_person_id"]
+    cols = fetch_match_columns(conn, division_ids)
+
+    # Résultats codés sur 1 octet (V=1, N=0, D=-1) + index du match dans cols
+    # en parallèle : tableaux compacts, aucun objet Python par match.
+    codes_by_player: dict[str, array] = {}
+    idx_by_player:   dict[str, array] = {}
+    for i, (hp, ap, fr) in enumerate(zip(
+        cols.home_person_id, cols.away_person_id, cols.final_result,
+    )):
         if not hp or not ap:
             continue
-        meta = {
-            "season":      m["season"],
-            "division_id": m["division_id"],
-            "game_week":   m["game_week"],
+        code = 1 if fr == 1 else 0 if fr == 2 else -1
+        for pid, c in ((hp, code), (ap, -code)):
+            codes = codes_by_player.get(pid)
+            if codes is None:
+                codes = codes_by_player[pid] = array("b")
+                idx_by_player[pid] = array("l")
+            codes.append(c)
+            idx_by_player[pid].append(i)
+
+    def meta_at(idx: array, k: int) -> dict | None:
+        """{season, division_id, game_week} du k-ième match du joueur (None si k < 0)."""
+        if k < 0:
+            return None
+        i = idx[k]
+        return {
+            "season":      cols.season[i],
+            "division_id": cols.division_id[i],
+            "game_week":   cols.game_week[i],
         }
-        fr = m["final_result"]
-        if fr == 1:
-            seq_by_player[hp].append(("W", meta))
-            seq_by_player[ap].append(("L", meta))
-        elif fr == 2:
-            seq_by_player[hp].append(("D", meta))
-            seq_by_player[ap].append(("D", meta))
-        else:
-            seq_by_player[hp].append(("L", meta))
-            seq_by_player[ap].append(("W", meta))
 
     result: dict[str, dict] = {}
-    for pid, seq in seq_by_player.items():
-        n = len(seq)
-        bw = bub = bl = 0
-        bw_s = bw_e = bub_s = bub_e = bl_s = bl_e = None
-        bw_ei = bub_ei = bl_ei = -1
-        cw = cub = cl = 0
-        cw_si = cub_si = cl_si = 0
-
-        for i, (r, meta) in enumerate(seq):
-            if r == "W":
-                if cw == 0:
-                    cw_si = i
-                cw += 1
-                if cub == 0:
-                    cub_si = i
-                cub += 1
-                cl = 0
-            elif r == "D":
-                cw = 0
-                if cub == 0:
-                    cub_si = i
-                cub += 1
-                cl = 0
-            else:  # L
-                cw = 0
-                cub = 0
-                if cl == 0:
-                    cl_si = i
-                cl += 1
-
-            if cw > bw:
-                bw = cw; bw_s = seq[cw_si][1]; bw_e = meta; bw_ei = i
-            if cub > bub:
-                bub = cub; bub_s = seq[cub_si][1]; bub_e = meta; bub_ei = i
-            if cl > bl:
-                bl = cl; bl_s = seq[cl_si][1]; bl_e = meta; bl_ei = i
-
-        # Série en cours (remonte la fin de la timeline)
-        cur_type = seq[-1][0] if seq else None
-        cur_length = 0
-        cur_si = n - 1
-        for i, (r, _) in enumerate(reversed(seq)):
-            if r == cur_type:
-                cur_length += 1
-                cur_si = n - 1 - i
-            else:
-                break
-        cur_start = seq[cur_si][1] if n > 0 else None
-        last_match = seq[-1][1] if seq else None
-
-        # Série invaincu en cours (V+N consécutifs à la fin)
-        cur_ub = 0
-        cur_ub_si = n - 1
-        for i, (r, _) in enumerate(reversed(seq)):
-            if r != "L":
-                cur_ub += 1
-                cur_ub_si = n - 1 - i
-            else:
-                break
-        cur_ub_start = seq[cur_ub_si][1] if n > 0 and cur_ub > 0 else None
+    for pid, codes in codes_by_player.items():
+        idx = idx_by_player[pid]
+        n = len(codes)
+
+        # Run-length encoding : un passage groupby (C) par critère de série
+        ub_runs = _run_lengths(c >= 0 for c in codes)
+        bw,  bw_si,  bw_ei  = _best_run(_run_lengths(c == 1 for c in codes))
+        bub, bub_si, bub_ei = _best_run(ub_runs)
+        bl,  bl_si,  bl_ei  = _best_run(_run_lengths(c == -1 for c in codes))
+
+        # Série en cours (dernier run) et invaincu en cours (V+N à la fin)
+        cur_code, cur_si, cur_length = _run_lengths(codes)[-1]
+        is_ub, ub_si, ub_len = ub_runs[-1]
+        cur_ub = ub_len if is_ub else 0
 
         result[pid] = {
             "best_win":              bw,
-            "best_win_start":        bw_s,
-            "best_win_end":          bw_e,
+            "best_win_start":        meta_at(idx, bw_si),
+            "best_win_end":          meta_at(idx, bw_ei),
             "best_win_ongoing":      bw_ei == n - 1,
             "best_unbeaten":         bub,
-            "best_unbeaten_start":   bub_s,
-            "best_unbeaten_end":     bub_e,
+            "best_unbeaten_start":   meta_at(idx, bub_si),
+            "best_unbeaten_end":     meta_at(idx, bub_ei),
             "best_unbeaten_ongoing": bub_ei == n - 1,
             "best_loss":             bl,
-            "best_loss_start":       bl_s,
-            "best_loss_end":         bl_e,
+            "best_loss_start":       meta_at(idx, bl_si),
+            "best_loss_end":         meta_at(idx, bl_ei),
             "best_loss_ongoing":     bl_ei == n - 1,
-            "current_type":          cur_type,
+            "current_type":          _STREAK_LABELS[cur_code],
             "current_length":        cur_length,
-            "current_start":         cur_start,
-            "last_match":            last_match,
+            "current_start":         meta_at(idx, cur_si),
+            "last_match":            meta_at(idx, n - 1),
             "current_unbeaten_length": cur_ub,
-            "current_unbeaten_start":  cur_ub_start,
+            "current_unbeaten_start":  meta_at(idx, ub_si) if cur_ub > 0 else None,
         }
 
     return result
@@ -601,21 +895,22 @@ def print_streaks_report(
     )
 
     LABELS = {"W": "V", "D": "N", "L": "D"}
-    print(f"\n=== Séries consécutives ({excl_label}) ===")
+    out: list[str] = [f"\n=== Séries consécutives ({excl_label}) ==="]
     col = 12
     header = (
         f"  {'Joueur':<{col}} {'Série V':>7} {'Invaincu':>8} {'Série D':>7} {'En cours':>9}"
     )
-    print(header)
-    print("  " + "-" * (len(header) - 2))
+    out.append(header)
+    out.append("  " + "-" * (len(header) - 2))
     for pid, s in sorted_rows:
         name    = display.get(pid, pid)[:col - 1]
         cur_lbl = f"{s['current_length']}{LABELS.get(s['current_type'], '?')}"
-        print(
+        out.append(
             f"  {name:<{col}} {s['best_win']:>7} {s['best_unbeaten']:>8} "
             f"{s['best_loss']:>7} {cur_lbl:>9}"
         )
-    print()
+    out.append("")
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 def print_palmares_report(
@@ -635,9 +930,11 @@ def print_palmares_report(
         excl.append("incomplets exclus")
     excl_label = ", ".join(excl) or "tout inclus"
 
-    print(f"\n=== Palmarès all-time ({excl_label}) ===")
+    # Lignes tamponnées puis une seule écriture stdout (idem autres rapports)
+    out: list[str] = [f"\n=== Palmarès all-time ({excl_label}) ==="]
     if not rows:
-        print("  [aucune donnée]")
+        out.append("  [aucune donnée]")
+        sys.stdout.write("\n".join(out) + "\n")
         return
 
     col = 12
@@ -645,11 +942,11 @@ def print_palmares_report(
         f"  {'Joueur':<{col}} {'Titres':>6} {'Podiums':>7} {'Chapeaux':>8} "
         f"{'Saisons':>7} {'Pts':>6} {'Moy':>6}"
     )
-    print(header)
-    print("  " + "-" * (len(header) - 2))
+    out.append(header)
+    out.append("  " + "-" * (len(header) - 2))
     for r in rows:
         name = display.get(r["person_id"], r["person_id"])[:col - 1]
-        print(
+        out.append(
             f"  {name:<{col}} {r['titles']:>6} {r['podiums']:>7} {r['chapeaux']:>8} "
             f"{r['seasons_played']:>7} {r['all_time_points']:>6} {r['all_time_avg_pts']:>6.2f}"
         )
@@ -657,7 +954,7 @@ def print_palmares_report(
     # Résumé par division MPG (complètes seulement)
     complete_divs = [(d, v) for d, v in mpg_data.items() if v["is_complete"]]
     if complete_divs:
-        print(f"\n  Champions/Chapeaux ({len(complete_divs)} divisions complètes) :")
+        out.append(f"\n  Champions/Chapeaux ({len(complete_divs)} divisions complètes) :")
         for div, data in complete_divs:
             srows = data["standings"]
             if len(srows) >= 2:
@@ -666,8 +963,9 @@ def print_palmares_report(
                 # Extrait le suffixe court : mpg_division_XXXXX_18_1 → "S18.1"
                 parts = div.rsplit("_", 2)
                 tag   = f"S{parts[-2]}.{parts[-1]}"
-                print(f"    [{data['season']}] {tag} : 1er {champ}  |  dernier {last}")
-    print()
+                out.append(f"    [{data['season']}] {tag} : 1er {champ}  |  dernier {last}")
+    out.append("")
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 def print_elo_report(
@@ -677,7 +975,10 @@ def print_elo_report(
     """Affiche le classement ELO."""
     display = _load_display_names()
     with get_conn() as conn:
-        elo = compute_elo(conn, include_covid=include_covid, include_incomplete=include_incomplete)
+        elo = compute_elo(
+            conn, include_covid=include_covid, include_incomplete=include_incomplete,
+            cache_path=ELO_CACHE_PATH,
+        )
 
     if not elo:
         print("[ELO] Aucune donnée.")
@@ -691,18 +992,19 @@ def print_elo_report(
     excl_label = ", ".join(excl) or "tout inclus"
 
     sorted_elo = sorted(elo.items(), key=lambda x: -x[1]["rating"])
-    print(f"\n=== ELO ({excl_label}) ===")
+    out: list[str] = [f"\n=== ELO ({excl_label}) ==="]
     col = 12
     header = f"  {'Rang':>4} {'Joueur':<{col}} {'Rating':>7} {'J':>4} {'V':>4} {'N':>4} {'D':>4}"
-    print(header)
-    print("  " + "-" * (len(header) - 2))
+    out.append(header)
+    out.append("  " + "-" * (len(header) - 2))
     for rank, (pid, s) in enumerate(sorted_elo, 1):
         name = display.get(pid, pid)[:col - 1]
-        print(
+        out.append(
             f"  {rank:>4} {name:<{col}} {s['rating']:>7.1f} "
             f"{s['matches_played']:>4} {s['wins']:>4} {s['draws']:>4} {s['losses']:>4}"
         )
-    print()
+    out.append("")
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 def print_h2h_report(
@@ -722,32 +1024,34 @@ def print_h2h_report(
         )
 
     n = stats["n_matches"]
-    print(f"\n=== H2H : {name_a} vs {name_b} ===")
+    out: list[str] = [f"\n=== H2H : {name_a} vs {name_b} ==="]
     if n == 0:
-        print("  Aucun match trouvé.")
-        print()
+        out.append("  Aucun match trouvé.")
+        out.append("")
+        sys.stdout.write("\n".join(out) + "\n")
         return
 
     diff_str = f"{stats['goal_diff']:+.0f}"
-    print(
+    out.append(
         f"  {n} matchs  |  "
         f"{name_a} {stats['a_wins']}-{stats['a_draws']}-{stats['a_losses']} {name_b}"
         f"  |  {stats['a_goals']:.0f}/{stats['b_goals']:.0f} buts  DIFF {diff_str}"
     )
     ha, aa = stats["home_a"], stats["away_a"]
     if ha["n"]:
-        print(
+        out.append(
             f"  · {name_a} dom. : {ha['n']} matchs — "
             f"V{ha['wins']} N{ha['draws']} D{ha['losses']} — "
             f"{ha['goals_for']:.0f}/{ha['goals_against']:.0f}"
         )
     if aa["n"]:
-        print(
+        out.append(
             f"  · {name_a} ext. : {aa['n']} matchs — "
             f"V{aa['wins']} N{aa['draws']} D{aa['losses']} — "
             f"{aa['goals_for']:.0f}/{aa['goals_against']:.0f}"
         )
-    print()
+    out.append("")
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 def print_mpg_season_report(division_id: str) -> None:
@@ -773,8 +1077,7 @@ def print_mpg_season_report(division_id: str) -> None:
         _apply_result(standings[ap], False, m["away_score"], m["home_score"], m["final_result"])
 
     rows = []
-    for person_id, s in standings.items():
-        row = dict(s)
+    for person_id, row in standings.items():
         row["person_id"] = person_id
         row["goal_diff"] = row["goals_for"] - row["goals_against"]
         mp = row["matches_played"]
@@ -786,23 +1089,24 @@ def print_mpg_season_report(division_id: str) -> None:
     n_matches = meta["n_matches"] if meta else len(matches)
     status    = " [incomplet]" if meta and meta["is_incomplete"] else ""
 
-    print(f"\n=== Saison MPG : {division_id} (IRL {season}, {n_matches} matchs{status}) ===")
+    out: list[str] = [f"\n=== Saison MPG : {division_id} (IRL {season}, {n_matches} matchs{status}) ==="]
     col = 12
     header = (
         f"  {'Rang':>4} {'Joueur':<{col}} "
         f"{'J':>3} {'V':>3} {'N':>3} {'D':>3} {'Pts':>4} "
         f"{'BP':>6} {'BC':>6} {'Diff':>6} {'Moy':>5}"
     )
-    print(header)
-    print("  " + "-" * (len(header) - 2))
+    out.append(header)
+    out.append("  " + "-" * (len(header) - 2))
     for rank, row in enumerate(rows, 1):
         name = display.get(row["person_id"], row["person_id"])[:col - 1]
         diff = f"{row['goal_diff']:+.1f}"
-        print(
+        out.append(
             f"  {rank:>4} {name:<{col}} "
             f"{row['matches_played']:>3} {row['wins']:>3} {row['draws']:>3} {row['losses']:>3} "
             f"{row['points']:>4} "
             f"{row['goals_for']:>6.1f} {row['goals_against']:>6.1f} "
             f"{diff:>6} {row['avg_pts']:>5.2f}"
         )
-    print()
+    out.append("")
+    sys.stdout.write("\n".join(out) + "\n")
@@ -2,6 +2,7 @@
 
 import re
 import unicodedata
+from functools import lru_cache
 from pathlib import Path
 
 import yaml
@@ -10,6 +11,9 @@ from mpg_db import get_conn
 DEFAULT_MAPPING_PATH = Path(__file__).parent / "people_mapping.yaml"
 COVID_SEASON = 6
 
+_RE_WS    = re.compile(r'\s+')
+_RE_PUNCT = re.compile(r"['\u2019\u2018`\-_\.]")
+
 
 def normalize_team_name(s: str) -> str:
     """Normalise un nom d'équipe pour la comparaison fuzzy.
@@ -21,16 +25,32 @@ def normalize_team_name(s: str) -> str:
     4. Ponctuation simple (apostrophes, tirets, underscores, points) → espace
     5. Re-collapse espaces après substitution
     """
-    s = re.sub(r'\s+', ' ', s.strip())
+    s = _RE_WS.sub(' ', s.strip())
     s = s.casefold()
-    s = unicodedata.normalize('NFD', s)
-    s = ''.join(c for c in s if unicodedata.category(c) != 'Mn')
+    if not s.isascii():  # rien à décomposer pour un nom ASCII
+        s = unicodedata.normalize('NFD', s)
+        s = ''.join(c for c in s if unicodedata.category(c) != 'Mn')
     # Apostrophes (droites et typographiques) et séparateurs → espace
-    s = re.sub(r"['\u2019\u2018`\-_\.]", ' ', s)
-    s = re.sub(r'\s+', ' ', s).strip()
+    s = _RE_PUNCT.sub(' ', s)
+    s = _RE_WS.sub(' ', s).strip()
     return s
 
 
+@lru_cache(maxsize=8)
+def _parse_yaml(path: Path, mtime_ns: int) -> dict:
+    return yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+
+
+def read_people_yaml(path: str | Path = DEFAULT_MAPPING_PATH) -> dict:
+    """Contenu brut de people_mapping.yaml, parsé une fois par version du fichier.
+
+    Cache clé (chemin, mtime) : une édition du YAML est prise en compte
+    automatiquement. Le dict retourné est partagé — ne pas le modifier.
+    """
+    path = Path(path)
+    return _parse_yaml(path, path.stat().st_mtime_ns)
+
+
 def load_people_mapping(path: str | Path = DEFAULT_MAPPING_PATH) -> dict:
     """Charge le fichier YAML.
 
@@ -38,7 +58,7 @@ def load_people_mapping(path: str | Path = DEFAULT_MAPPING_PATH) -> dict:
     L'index est pré-calculé avec normalize_team_name pour éviter toute
     recomputation à chaque appel de resolve_person.
     """
-    data = yaml.safe_load(Path(path).read_text(encoding="utf-8"))
+    data = read_people_yaml(path)
     index: dict[str, tuple[str, str]] = {}
     for person_id, info in data.get("persons", {}).items():
         display = info.get("display_name", person_id)
@@ -75,22 +95,21 @@ def enrich_teams_with_person_id(
             params = (division_id,)
         teams = conn.execute(query, params).fetchall()
 
-        mapped = unmapped = 0
         unmapped_names: list[str] = []
+        updates: list[tuple[str, str]] = []  # (person_id, team_id)
 
         for team in teams:
             result = resolve_person(team["name"], mapping)
             if result:
                 person_id, _ = result
-                conn.execute(
-                    "UPDATE teams SET person_id=? WHERE id=?",
-                    (person_id, team["id"]),
-                )
-                mapped += 1
+                updates.append((person_id, team["id"]))
             else:
-                unmapped += 1
                 unmapped_names.append(team["name"])
 
+        # Un seul statement préparé, une seule transaction (commit en sortie du with)
+        conn.executemany("UPDATE teams SET person_id=? WHERE id=?", updates)
+        mapped, unmapped = len(updates), len(unmapped_names)
+
     scope = f" [{division_id}]" if division_id else ""
     print(f"[PEOPLE] {mapped} équipes mappées, {unmapped} non mappées{scope}")
     if unmapped_names:
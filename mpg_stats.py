@@ -3,12 +3,57 @@
 Divisions COVID et incomplètes exclues par défaut (via divisions_metadata).
 """
 
-from collections import defaultdict
-from mpg_db import get_conn, get_excluded_divisions
+import heapq
+import sys
+
+from mpg_db import get_ro_conn
 
 COVID_SEASON = 6  # conservé pour rétro-compat (utilisé dans test_batch_import)
 
 
+# Requête de compute_records à texte constant (une variante par présence du
+# filtre division) : sqlite3 réutilise le statement préparé d'un appel à
+# l'autre. Les exclusions sont lues par sous-requête sur divisions_metadata,
+# les flags sont des paramètres liés — plus de IN (?, ?, …) à largeur variable.
+# Agrégation entièrement côté SQLite : chaque match joué donne deux lignes
+# « côté équipe » (domicile, extérieur) puis un seul GROUP BY team_id.
+# Outcome dérivé des scores (finalResult de l'API vaut toujours 1).
+_RECORDS_SQL = """
+    WITH played AS (
+        SELECT m.home_team_id, m.away_team_id, m.home_score, m.away_score
+        FROM matches m
+        WHERE m.division_id NOT IN (
+                SELECT division_id FROM divisions_metadata
+                WHERE (is_covid = 1 AND NOT :include_covid)
+                   OR (is_incomplete = 1 AND NOT :include_incomplete)
+                   OR is_current = 1
+              )
+          {division_filter}
+          AND m.home_team_id IS NOT NULL AND m.away_team_id IS NOT NULL
+          AND m.home_score IS NOT NULL AND m.away_score IS NOT NULL
+    ),
+    sides AS (
+        SELECT home_team_id AS team_id, home_score AS gf, away_score AS ga FROM played
+        UNION ALL
+        SELECT away_team_id, away_score, home_score FROM played
+    )
+    SELECT s.team_id,
+           t.name           AS team_name,
+           t.person_id,
+           COUNT(*)         AS matches_played,
+           SUM(s.gf > s.ga) AS wins,
+           SUM(s.gf = s.ga) AS draws,
+           SUM(s.gf < s.ga) AS losses,
+           TOTAL(s.gf)      AS goals_for,
+           TOTAL(s.ga)      AS goals_against
+    FROM sides s
+    LEFT JOIN teams t ON t.id = s.team_id
+    GROUP BY s.team_id
+"""
+_RECORDS_SQL_ALL = _RECORDS_SQL.format(division_filter="")
+_RECORDS_SQL_DIV = _RECORDS_SQL.format(division_filter="AND m.division_id = :division_id")
+
+
 def compute_records(
     division_id: str | None = None,
     include_covid: bool = False,
@@ -16,93 +61,45 @@ def compute_records(
 ) -> dict:
     """Calcule W/D/L, points, score moyen par équipe.
 
-    finalResult dans raw_json : 1=home win, 2=draw, 3=away win.
+    Outcome dérivé des scores (victoire / nul / défaite), agrégé en SQL.
+    Saison en cours (is_current) toujours exclue ; COVID / incomplètes selon les flags.
     Retourne {team_id: {wins, draws, losses, points, goals_for, goals_against,
                         matches_played, avg_score, person_id, team_name}}.
     """
-    excluded = get_excluded_divisions(
-        include_covid=include_covid,
-        include_incomplete=include_incomplete,
-    )
-
-    filters = ["1=1"]
-    params: list = []
-    if division_id:
-        filters.append("m.division_id=?")
-        params.append(division_id)
-    if excluded:
-        placeholders = ",".join("?" * len(excluded))
-        filters.append(f"m.division_id NOT IN ({placeholders})")
-        params.extend(excluded)
-    filters_sql = " AND ".join(filters)
-
-    with get_conn() as conn:
-        rows = conn.execute(
-            f"""SELECT m.id, m.home_team_id, m.away_team_id,
-                       m.home_score, m.away_score, m.raw_json,
-                       ht.name AS home_name, ht.person_id AS home_person,
-                       at.name AS away_name, at.person_id AS away_person
-                FROM matches m
-                LEFT JOIN teams ht ON m.home_team_id = ht.id
-                LEFT JOIN teams at ON m.away_team_id = at.id
-                WHERE {filters_sql}""",
-            params,
-        ).fetchall()
-
-    stats: dict = defaultdict(lambda: {
-        "wins": 0, "draws": 0, "losses": 0, "points": 0,
-        "goals_for": 0.0, "goals_against": 0.0, "matches_played": 0,
-        "team_name": "", "person_id": None,
-    })
-
-    for r in rows:
-        h, a = r["home_team_id"], r["away_team_id"]
-        hs, as_ = r["home_score"], r["away_score"]
-
-        if not h or not a or hs is None or as_ is None:
-            continue
-
-        # Dériver l'outcome depuis les scores (finalResult de l'API est toujours 1)
-        if hs > as_:
-            outcome = 1  # home win
-        elif hs < as_:
-            outcome = 3  # away win
-        else:
-            outcome = 2  # draw
-
-        for team_id, is_home in ((h, True), (a, False)):
-            s = stats[team_id]
-            s["team_name"]    = r["home_name"] if is_home else r["away_name"]
-            s["person_id"]    = r["home_person"] if is_home else r["away_person"]
-            s["matches_played"] += 1
-            gf = hs if is_home else as_
-            ga = as_ if is_home else hs
-            s["goals_for"]     += gf
-            s["goals_against"] += ga
-
-            if outcome == 2:
-                s["draws"]  += 1
-                s["points"] += 1
-            elif (outcome == 1 and is_home) or (outcome == 3 and not is_home):
-                s["wins"]   += 1
-                s["points"] += 3
-            else:
-                s["losses"] += 1
-
-    # Calcul score moyen
-    for s in stats.values():
-        mp = s["matches_played"]
-        s["avg_score"] = round(s["goals_for"] / mp, 2) if mp else 0.0
-
-    return dict(stats)
+    sql = _RECORDS_SQL_DIV if division_id else _RECORDS_SQL_ALL
+    params = {
+        "division_id":        division_id,
+        "include_covid":      include_covid,
+        "include_incomplete": include_incomplete,
+    }
+
+    stats: dict = {}
+    with get_ro_conn() as conn:
+        # Curseur consommé ligne à ligne : pas de liste intermédiaire
+        for r in conn.execute(sql, params):
+            mp = r["matches_played"]
+            stats[r["team_id"]] = {
+                "wins":           r["wins"],
+                "draws":          r["draws"],
+                "losses":         r["losses"],
+                "points":         3 * r["wins"] + r["draws"],
+                "goals_for":      r["goals_for"],
+                "goals_against":  r["goals_against"],
+                "matches_played": mp,
+                "team_name":      r["team_name"],
+                "person_id":      r["person_id"],
+                "avg_score":      round(r["goals_for"] / mp, 2),
+            }
+    return stats
 
 
 def print_stats_report(
     division_id: str | None = None,
     include_covid: bool = False,
     include_incomplete: bool = False,
+    top: int | None = None,
 ) -> None:
-    """Affiche le classement W/D/L par équipe."""
+    """Affiche le classement W/D/L par équipe (les `top` premières si fourni)."""
     records = compute_records(
         division_id=division_id,
         include_covid=include_covid,
@@ -119,19 +116,25 @@ def print_stats_report(
         exclusions.append("incomplets exclus")
     excl_label = ", ".join(exclusions) or "tout inclus"
     div_label  = f" | {division_id}" if division_id else ""
-    print(f"\n=== Classement ({excl_label}{div_label}) ===")
-
     col = 24
     header = f"{'Équipe':<{col}} {'Pers.':<10} {'J':>3} {'V':>3} {'N':>3} {'D':>3} {'Pts':>4} {'Moy':>6}"
-    print(header)
-    print("-" * len(header))
-
-    for team_id, s in sorted(records.items(), key=lambda x: -x[1]["points"]):
-        name    = (s["person_id"] or s["team_name"] or team_id)[:col - 1]
-        team_lbl = s["team_name"][:9]
-        print(
-            f"{name:<{col}} {team_lbl:<10} "
-            f"{s['matches_played']:>3} {s['wins']:>3} {s['draws']:>3} {s['losses']:>3} "
-            f"{s['points']:>4} {s['avg_score']:>6.2f}"
+    # Gabarit de ligne construit une fois, lignes tamponnées puis une seule
+    # écriture stdout
+    row_fmt = f"{{:<{col}}} {{:<10}} {{:>3}} {{:>3}} {{:>3}} {{:>3}} {{:>4}} {{:>6.2f}}"
+    lines = [f"\n=== Classement ({excl_label}{div_label}) ===", header, "-" * len(header)]
+
+    if top is not None:
+        # Sélection partielle O(N log K) ; même ordre que le tri complet (stable)
+        ranked = heapq.nlargest(top, records.items(), key=lambda x: x[1]["points"])
+    else:
+        ranked = sorted(records.items(), key=lambda x: x[1]["points"], reverse=True)
+    lines.extend(
+        row_fmt.format(
+            (s["person_id"] or s["team_name"] or team_id)[:col - 1], s["team_name"][:9],
+            s["matches_played"], s["wins"], s["draws"], s["losses"],
+            s["points"], s["avg_score"],
         )
-    print()
+        for team_id, s in ranked
+    )
+    lines.append("")
+    sys.stdout.write("\n".join(lines) + "\n")
@@ -6,12 +6,15 @@ Usage : python test_batch_import.py
 import json
 import sys
 import sqlite3
+from functools import lru_cache
 from pathlib import Path
 
 DB_PATH = Path(__file__).parent / "mpg.db"
 
 
+@lru_cache(maxsize=1)
 def _conn():
+    """Connexion partagée par tous les tests (ouverte une fois, fermée par main)."""
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     return conn
@@ -42,16 +45,15 @@ def test_season_column():
 # ── Test 2 : divisions-file simulé ──────────────────────────────────────────
 
 def test_divisions_file_parsing():
+    from mpg_client import _DIV_LINE_RE
+
     content = """
 # commentaire ignoré
 mpg_division_QU0SUZ6HQPB_18_1
 
 mpg_division_QU0SUZ6HQPB_17_1
 """
-    divisions = [
-        l.strip() for l in content.strip().splitlines()
-        if l.strip() and not l.startswith("#")
-    ]
+    divisions = _DIV_LINE_RE.findall(content)
     assert len(divisions) == 2, f"Attendu 2 divisions, obtenu {len(divisions)}"
     print(f"  ✓ parsing divisions-file : {divisions}")
 
@@ -260,13 +262,18 @@ TESTS = [
 def main():
     print(f"Tests batch import ({DB_PATH})\n{'─' * 50}")
     errors = []
-    for test in TESTS:
-        name = test.__name__
-        try:
-            test()
-        except Exception as exc:
-            errors.append((name, exc))
-            print(f"  ✗ {name} : {exc}")
+    try:
+        for test in TESTS:
+            name = test.__name__
+            try:
+                test()
+            except Exception as exc:
+                errors.append((name, exc))
+                print(f"  ✗ {name} : {exc}")
+    finally:
+        if _conn.cache_info().currsize:
+            _conn().close()
+        _conn.cache_clear()
 
     print(f"\n{'─' * 50}")
     if errors:
@@ -3,11 +3,16 @@
 Prérequis : DB mpg.db populée via --sync-divisions avec toutes les divisions
 et people_mapping.yaml appliqué (person_id renseigné sur toutes les équipes).
 
-Usage : python test_legacy_engine.py
+Usage : python test_legacy_engine.py [--fast]
+  --fast : saute les tests marqués lents (test.slow = True)
 """
 
+import argparse
 import sqlite3
 import sys
+import time
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
 
 DB_PATH = Path(__file__).parent / "mpg.db"
@@ -16,27 +21,48 @@ COVID_DIVISION   = "mpg_division_QU0SUZ6HQPB_6_1"
 CURRENT_DIVISION = "mpg_division_QU0SUZ6HQPB_18_1"
 
 
+@lru_cache(maxsize=1)
 def _conn():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    """Connexion lecture seule partagée par tous les tests (fermée par main).
+
+    Les caches par connexion du moteur (divisions, matchs, classements)
+    profitent ainsi d'un test à l'autre.
+    """
+    from mpg_db import get_ro_conn
+
+    conn = get_ro_conn()
+    conn.isolation_level = None  # autocommit, aucun BEGIN/COMMIT implicite
     return conn
 
 
+_RESULTS: dict[tuple, object] = {}
+
+
+def _cached(fn, *args):
+    """fn(_conn(), *args) calculé une seule fois pour toute la suite.
+
+    DB en lecture seule → résultat déterministe ; partagé, ne pas le modifier.
+    """
+    key = (fn.__name__, *args)
+    if key not in _RESULTS:
+        _RESULTS[key] = fn(_conn(), *args)
+    return _RESULTS[key]
+
+
 # ── Test 1 : exclusion COVID/incomplet par défaut ─────────────────────────────
 
 def test_covid_exclusion_default():
     """La division COVID+incompl. est exclue par défaut et incluse avec les flags."""
     from mpg_legacy_engine import list_included_divisions
 
-    with _conn() as conn:
-        included_default = list_included_divisions(conn, include_covid=False, include_incomplete=False)
-        included_all     = list_included_divisions(conn, include_covid=True,  include_incomplete=True, include_current=True)
+    conn = _conn()
+    included_default = list_included_divisions(conn, include_covid=False, include_incomplete=False)
+    included_all     = list_included_divisions(conn, include_covid=True,  include_incomplete=True, include_current=True)
 
     assert COVID_DIVISION not in included_default, (
         f"{COVID_DIVISION} ne devrait pas être dans les divisions incluses par défaut"
     )
-    with _conn() as conn:
-        meta_count = conn.execute("SELECT COUNT(*) AS n FROM divisions_metadata").fetchone()["n"]
+    meta_count = conn.execute("SELECT COUNT(*) FROM divisions_metadata").fetchone()[0]
     assert len(included_all) == meta_count, (
         f"Avec include_covid+incomplete, attendu {meta_count} divisions, obtenu {len(included_all)}"
     )
@@ -52,9 +78,9 @@ def test_current_exclusion_default():
     """La saison en cours (is_current=1) est exclue par défaut et incluse avec include_current=True."""
     from mpg_legacy_engine import list_included_divisions
 
-    with _conn() as conn:
-        included_default  = list_included_divisions(conn)
-        included_with_cur = list_included_divisions(conn, include_current=True)
+    conn = _conn()
+    included_default  = list_included_divisions(conn)
+    included_with_cur = list_included_divisions(conn, include_current=True)
 
     assert CURRENT_DIVISION not in included_default, (
         f"{CURRENT_DIVISION} ne devrait pas être dans les divisions incluses par défaut"
@@ -74,8 +100,7 @@ def test_palmares_persons():
     """compute_palmares retourne exactement 8 personnes (8 joueurs mappés)."""
     from mpg_legacy_engine import compute_palmares
 
-    with _conn() as conn:
-        rows = compute_palmares(conn)
+    rows = _cached(compute_palmares)
 
     assert len(rows) == 8, (
         f"Attendu 8 personnes dans le palmarès, obtenu {len(rows)} : "
@@ -97,13 +122,12 @@ def test_palmares_titles_consistency():
     """Il y a exactement 1 titre et 1 chapeau par division MPG complète incluse."""
     from mpg_legacy_engine import compute_palmares, compute_mpg_season_standings
 
-    with _conn() as conn:
-        rows     = compute_palmares(conn)
-        mpg_data = compute_mpg_season_standings(conn)
+    rows     = _cached(compute_palmares)
+    mpg_data = _cached(compute_mpg_season_standings)
 
-    total_titles   = sum(r["titles"]   for r in rows)
-    total_chapeaux = sum(r["chapeaux"] for r in rows)
-    complete_divs  = sum(1 for d in mpg_data.values() if d["is_complete"])
+    total_titles   = sum(map(itemgetter("titles"), rows))
+    total_chapeaux = sum(map(itemgetter("chapeaux"), rows))
+    complete_divs  = sum(map(itemgetter("is_complete"), mpg_data.values()))
 
     assert total_titles > 0, "Aucun titre décerné — données insuffisantes ?"
     assert total_titles == complete_divs, (
@@ -124,19 +148,19 @@ def test_palmares_pts_not_identical():
     """Au moins 2 joueurs ont des Pts all-time différents (sinon bug d'agrégation)."""
     from mpg_legacy_engine import compute_palmares
 
-    with _conn() as conn:
-        rows = compute_palmares(conn)
+    rows = _cached(compute_palmares)
 
     assert len(rows) >= 2, "Pas assez de joueurs pour le test"
-    pts_values = [r["all_time_points"] for r in rows]
-    assert len(set(pts_values)) >= 2, (
+    pts_values = list(map(itemgetter("all_time_points"), rows))
+    distinct   = sorted(set(pts_values))
+    assert len(distinct) >= 2, (
         f"Tous les joueurs ont le même Pts all-time ({pts_values[0]}) — "
         "bug probable dans fetch_matches (outcome non dérivé des scores réels)"
     )
     print(
         f"  ✓ Pts all-time variés : "
-        f"min={min(pts_values)}, max={max(pts_values)}, "
-        f"valeurs={sorted(set(pts_values))}"
+        f"min={distinct[0]}, max={distinct[-1]}, "
+        f"valeurs={distinct}"
     )
 
 
@@ -146,21 +170,26 @@ def test_champion_chapeau_per_division():
     """Pour chaque division complète incluse : champion ≠ chapeau, standings >= 8."""
     from mpg_legacy_engine import compute_mpg_season_standings
 
-    with _conn() as conn:
-        mpg_data = compute_mpg_season_standings(conn)
+    mpg_data = _cached(compute_mpg_season_standings)
 
-    complete_divs = {d: v for d, v in mpg_data.items() if v["is_complete"]}
+    complete_divs = [(d, v["standings"]) for d, v in mpg_data.items() if v["is_complete"]]
     assert len(complete_divs) > 0, "Aucune division complète en DB"
 
-    for div, data in complete_divs.items():
-        srows = data["standings"]
-        assert len(srows) >= 8, f"{div} : moins de 8 joueurs mappés ({len(srows)})"
-        champion = srows[0]["person_id"]
-        chapeau  = srows[-1]["person_id"]
-        assert champion != chapeau, f"{div} : champion == chapeau ({champion})"
-        # Vérifier que le champion a vraiment plus de points que le dernier
-        assert srows[0]["points"] >= srows[-1]["points"], \
-            f"{div} : classement incohérent"
+    # Première division invalide : < 8 joueurs mappés, champion == chapeau,
+    # ou champion avec moins de points que le dernier
+    bad = next((
+        (div, srows) for div, srows in complete_divs
+        if len(srows) < 8
+        or srows[0]["person_id"] == srows[-1]["person_id"]
+        or srows[0]["points"] < srows[-1]["points"]
+    ), None)
+    if bad is not None:
+        div, srows = bad
+        raise AssertionError(
+            f"{div} : classement incohérent — {len(srows)} joueurs, "
+            f"champion {srows[0]['person_id']} ({srows[0]['points']} pts), "
+            f"chapeau {srows[-1]['person_id']} ({srows[-1]['points']} pts)"
+        )
 
     print(f"  ✓ champion/chapeau OK sur {len(complete_divs)} divisions complètes")
 
@@ -171,8 +200,7 @@ def test_h2h_known_pair():
     """compute_head_to_head ne plante pas et retourne n_matches > 0 pour raph/manu."""
     from mpg_legacy_engine import compute_head_to_head
 
-    with _conn() as conn:
-        stats = compute_head_to_head(conn, "raph", "manu")
+    stats = _cached(compute_head_to_head, "raph", "manu")
 
     assert stats["n_matches"] > 0, (
         "Aucun match H2H trouvé entre raph et manu"
@@ -195,9 +223,9 @@ def test_h2h_symmetry():
     """H2H(A,B) et H2H(B,A) sont symétriques."""
     from mpg_legacy_engine import compute_head_to_head
 
-    with _conn() as conn:
-        ab = compute_head_to_head(conn, "raph", "manu")
-        ba = compute_head_to_head(conn, "manu", "raph")
+    # BA recalculé (pas dérivé de AB) : c'est la symétrie du moteur qu'on teste
+    ab = _cached(compute_head_to_head, "raph", "manu")
+    ba = compute_head_to_head(_conn(), "manu", "raph")
 
     assert ab["n_matches"] == ba["n_matches"]
     assert ab["a_wins"]    == ba["a_losses"]
@@ -218,8 +246,7 @@ def test_elo_persons():
     """compute_elo retourne exactement 8 ratings."""
     from mpg_legacy_engine import compute_elo
 
-    with _conn() as conn:
-        elo = compute_elo(conn)
+    elo = _cached(compute_elo)
 
     assert len(elo) == 8, (
         f"Attendu 8 ratings ELO, obtenu {len(elo)} : {list(elo.keys())}"
@@ -234,11 +261,10 @@ def test_elo_zero_sum():
     """Propriété ELO : moyenne des ratings = 1500 (zero-sum conservé)."""
     from mpg_legacy_engine import compute_elo
 
-    with _conn() as conn:
-        elo = compute_elo(conn)
+    elo = _cached(compute_elo)
 
     n     = len(elo)
-    total = sum(v["rating"] for v in elo.values())
+    total = sum(map(itemgetter("rating"), elo.values()))
     avg   = total / n
     assert abs(avg - 1500.0) < 0.1, (
         f"Rating moyen {avg:.3f} ≠ 1500 (propriété zero-sum violée)"
@@ -252,12 +278,11 @@ def test_elo_wl_not_identical():
     """Les victoires et défaites varient entre joueurs (sinon bug outcome ELO)."""
     from mpg_legacy_engine import compute_elo
 
-    with _conn() as conn:
-        elo = compute_elo(conn)
+    elo = _cached(compute_elo)
 
     assert len(elo) >= 2
-    wins_values   = [v["wins"]   for v in elo.values()]
-    losses_values = [v["losses"] for v in elo.values()]
+    wins_values   = list(map(itemgetter("wins"),   elo.values()))
+    losses_values = list(map(itemgetter("losses"), elo.values()))
 
     assert len(set(wins_values)) >= 2, (
         f"Tous les joueurs ont le même nombre de victoires ({wins_values[0]}) — "
@@ -272,6 +297,88 @@ def test_elo_wl_not_identical():
     )
 
 
+# ── Test : ELO incrémental (cache persisté) ─────────────────────────────────
+
+def test_elo_incremental_cache():
+    """Reprendre l'ELO depuis le cache puis rejouer la queue = recalcul complet."""
+    import json
+    import tempfile
+    from mpg_legacy_engine import compute_elo, list_included_divisions
+
+    src = _conn()
+    full     = sqlite3.connect(":memory:")
+    older    = sqlite3.connect(":memory:")
+    partial  = sqlite3.connect(":memory:")
+    unmapped = sqlite3.connect(":memory:")
+    for c in (full, older, partial, unmapped):
+        src.backup(c)
+        c.row_factory = sqlite3.Row
+
+    # Historiques « d'avant-hier » et « d'hier » : les 10 / 5 derniers matchs
+    # joués pas encore importés
+    divisions = list_included_divisions(full)
+    last_div  = divisions[-1]
+    for conn, n in ((older, 10), (partial, 5)):
+        conn.execute("""
+            DELETE FROM matches WHERE id IN (
+                SELECT id FROM matches
+                WHERE division_id = ? AND home_score IS NOT NULL
+                ORDER BY game_week DESC, id DESC LIMIT ?
+            )
+        """, (last_div, n))
+
+    def last_played_key(conn) -> list:
+        """Clé (season, division_id, game_week, match_id) du dernier match joué."""
+        ph = ",".join("?" * len(divisions))
+        return list(conn.execute(f"""
+            SELECT season, division_id, game_week, id FROM matches
+            WHERE division_id IN ({ph})
+              AND home_score IS NOT NULL AND away_score IS NOT NULL
+            ORDER BY season DESC, division_id DESC, game_week DESC, id DESC
+            LIMIT 1
+        """, divisions).fetchone())
+
+    def saved_hwm(path: Path) -> list:
+        return json.loads(path.read_text(encoding="utf-8"))["hwm"]
+
+    # Équipe pas encore mappée (person_id posé ensuite par --apply-mapping) :
+    # ses matchs sont ignorés puis doivent compter une fois le mapping appliqué
+    unmapped.execute("""
+        UPDATE teams SET person_id = NULL WHERE id = (
+            SELECT id FROM teams
+            WHERE division_id = ? AND person_id IS NOT NULL
+            ORDER BY id LIMIT 1
+        )
+    """, (last_div,))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = Path(tmp) / "elo_cache.json"
+        compute_elo(older, cache_path=cache_path)
+        compute_elo(partial, cache_path=cache_path)
+        # hwm réécrit après une reprise : la reprise suivante part de là
+        assert saved_hwm(cache_path) == last_played_key(partial), (
+            f"hwm persisté {saved_hwm(cache_path)} ≠ dernier match {last_played_key(partial)}"
+        )
+        resumed = compute_elo(full, cache_path=cache_path)
+        assert saved_hwm(cache_path) == last_played_key(full), (
+            f"hwm persisté {saved_hwm(cache_path)} ≠ dernier match {last_played_key(full)}"
+        )
+        remap_path = Path(tmp) / "elo_cache_remap.json"
+        compute_elo(unmapped, cache_path=remap_path)
+        remapped = compute_elo(full, cache_path=remap_path)
+    expected = compute_elo(full)
+
+    assert resumed == expected, "ELO repris depuis le cache ≠ ELO recalculé"
+    assert remapped == expected, "ELO repris après --apply-mapping ≠ ELO recalculé"
+    print(
+        f"  ✓ ELO incrémental : 2 reprises (5 + 5 matchs), équipe remappée recalculée, "
+        f"{len(resumed)} ratings identiques"
+    )
+
+
+test_elo_incremental_cache.slow = True  # 4 copies de la DB + 6 calculs ELO
+
+
 # ── Test 11 : resolve_person_id ──────────────────────────────────────────────
 
 def test_resolve_person_id():
@@ -288,11 +395,13 @@ def test_resolve_person_id():
         ("PIMPAMRAMI",    "manu"),
         ("Inconnu FC",    None),
     ]
-    for name, expected in cases:
-        result = resolve_person_id(name)
-        assert result == expected, (
-            f"resolve_person_id({name!r}) → {result!r}, attendu {expected!r}"
-        )
+    names, expected = zip(*cases)
+    results    = tuple(map(resolve_person_id, names))
+    mismatches = [
+        f"{n!r} → {r!r} (attendu {e!r})"
+        for n, e, r in zip(names, expected, results) if r != e
+    ]
+    assert not mismatches, f"resolve_person_id : {', '.join(mismatches)}"
     print(f"  ✓ resolve_person_id : {len(cases)} cas validés")
 
 
@@ -302,8 +411,8 @@ def test_streaks():
     """Vérifie la cohérence des séries all-time par joueur."""
     from mpg_legacy_engine import compute_streaks
 
-    with _conn() as conn:
-        streaks = compute_streaks(conn)
+    conn = _conn()
+    streaks = compute_streaks(conn)
 
     assert len(streaks) == 8, f"Attendu 8 joueurs, obtenu {len(streaks)}"
 
@@ -318,16 +427,16 @@ def test_streaks():
         )
         assert s["current_length"] >= 1, f"{pid} : current_length doit être >= 1"
 
-    wins   = [s["best_win"]      for s in streaks.values()]
-    losses = [s["best_loss"]     for s in streaks.values()]
+    wins   = list(map(itemgetter("best_win"),  streaks.values()))
+    losses = list(map(itemgetter("best_loss"), streaks.values()))
     assert len(set(wins))   > 1, f"best_win identiques pour tous ({wins}) — suspect"
     assert len(set(losses)) > 1, f"best_loss identiques pour tous ({losses}) — suspect"
 
-    best_win_pid = max(streaks, key=lambda p: streaks[p]["best_win"])
+    best_win_pid, best_win = max(zip(streaks, wins), key=itemgetter(1))
     print(
         f"  ✓ séries : 8 joueurs — meilleure série V : "
-        f"{best_win_pid} ({streaks[best_win_pid]['best_win']}), "
-        f"invaincu max : {max(s['best_unbeaten'] for s in streaks.values())}"
+        f"{best_win_pid} ({best_win}), "
+        f"invaincu max : {max(map(itemgetter('best_unbeaten'), streaks.values()))}"
     )
 
 
@@ -345,28 +454,49 @@ TESTS = [
     test_elo_persons,
     test_elo_zero_sum,
     test_elo_wl_not_identical,             # nouveau — détecte W/L uniformes
+    test_elo_incremental_cache,            # reprise depuis l'état persisté
     test_resolve_person_id,
     test_streaks,                          # nouveau — séries V/N/D all-time
 ]
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Tests Legacy Engine")
+    parser.add_argument("--fast", action="store_true",
+                        help="saute les tests marqués lents")
+    args = parser.parse_args()
+
+    tests = [t for t in TESTS if not (args.fast and getattr(t, "slow", False))]
     print(f"Tests Legacy Engine ({DB_PATH})\n{'─' * 50}")
-    errors = []
-    for test in TESTS:
-        name = test.__name__
-        try:
-            test()
-        except Exception as exc:
-            errors.append((name, exc))
-            print(f"  ✗ {name} : {exc}")
+    errors  = []
+    timings = []
+    try:
+        for test in tests:
+            name = test.__name__
+            t0 = time.perf_counter_ns()
+            try:
+                test()
+            except Exception as exc:
+                errors.append((name, exc))
+                print(f"  ✗ {name} : {exc}")
+            dt_ms = (time.perf_counter_ns() - t0) / 1e6
+            timings.append((dt_ms, name))
+            print(f"    [{dt_ms:7.1f} ms] {name}")
+    finally:
+        if _conn.cache_info().currsize:
+            _conn().close()
+        _conn.cache_clear()
 
     print(f"\n{'─' * 50}")
+    print("Plus lents : " + ", ".join(
+        f"{name} ({dt_ms:.1f} ms)" for dt_ms, name in sorted(timings, reverse=True)[:3]
+    ))
+    skipped = f" ({len(TESTS) - len(tests)} test(s) lent(s) sauté(s))" if len(tests) < len(TESTS) else ""
     if errors:
-        print(f"❌ {len(errors)}/{len(TESTS)} test(s) échoués")
+        print(f"❌ {len(errors)}/{len(tests)} test(s) échoués{skipped}")
         sys.exit(1)
     else:
-        print(f"✅ {len(TESTS)}/{len(TESTS)} tests passés")
+        print(f"✅ {len(tests)}/{len(tests)} tests passés{skipped}")
 
 
 if __name__ == "__main__":